@@ -0,0 +1,39 @@
+# alembic/env.py
+from logging.config import fileConfig
+
+from alembic import context
+
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from database import Base, engine
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can only alter and drop columns by copying the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+connection = config.attributes.get("connection")
+if connection is not None:
+    # Called by migrations.upgrade() from the app, on its connection; the
+    # app's logging is left alone
+    run_migrations(connection)
+elif context.is_offline_mode():
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    context.configure(url=engine.url, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+else:
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    with engine.connect() as connection:
+        run_migrations(connection)
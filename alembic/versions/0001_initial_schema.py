@@ -0,0 +1,69 @@
+"""Initial schema: users and resumes as first created by create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not has_table(conn, 'users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_id', 'users', ['id'])
+    if not has_table(conn, 'resumes'):
+        op.create_table(
+            'resumes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(), nullable=True),
+            sa.Column('full_name', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('phone', sa.String(), nullable=True),
+            sa.Column('city', sa.String(), nullable=True),
+            sa.Column('language', sa.String(), nullable=True),
+            sa.Column('summary', sa.Text(), nullable=True),
+            sa.Column('experience', sa.Text(), nullable=True),
+            sa.Column('education', sa.Text(), nullable=True),
+            sa.Column('skills', sa.Text(), nullable=True),
+            sa.Column('projects', sa.Text(), nullable=True),
+            sa.Column('certifications', sa.Text(), nullable=True),
+            sa.Column('languages', sa.Text(), nullable=True),
+            sa.Column('photo', sa.String(), nullable=True),
+            sa.Column('experience_title', sa.String(), nullable=True),
+            sa.Column('education_title', sa.String(), nullable=True),
+            sa.Column('skills_title', sa.String(), nullable=True),
+            sa.Column('projects_title', sa.String(), nullable=True),
+            sa.Column('certifications_title', sa.String(), nullable=True),
+            sa.Column('languages_title', sa.String(), nullable=True),
+            sa.Column('summary_title', sa.String(), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_resumes_id', 'resumes', ['id'])
+        op.create_index('ix_resumes_title', 'resumes', ['title'])
+
+
+def downgrade() -> None:
+    op.drop_table('resumes')
+    op.drop_table('users')
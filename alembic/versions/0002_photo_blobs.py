@@ -0,0 +1,61 @@
+"""Move inline base64 photos into the blob store
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:01:00
+
+"""
+import base64
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from blob_store import put_blob
+from migrations import has_column, has_index
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not has_column(conn, 'resumes', 'photo_hash'):
+        op.add_column('resumes', sa.Column('photo_hash', sa.String(64), nullable=True))
+    if not has_index(conn, 'resumes', 'ix_resumes_photo_hash'):
+        op.create_index('ix_resumes_photo_hash', 'resumes', ['photo_hash'])
+    if not has_column(conn, 'resumes', 'photo'):
+        return
+
+    rows = conn.execute(sa.text("SELECT id, photo FROM resumes WHERE photo IS NOT NULL")).fetchall()
+    for resume_id, photo in rows:
+        digest = None
+        if photo.startswith("data:image"):
+            try:
+                _, encoded = photo.split(",", 1)
+                digest = put_blob(base64.b64decode(encoded))
+            except Exception as e:
+                print(f"Could not migrate photo of resume {resume_id}: {e}")
+                continue
+        conn.execute(
+            sa.text("UPDATE resumes SET photo_hash = :digest, photo = NULL WHERE id = :id"),
+            {"digest": digest, "id": resume_id},
+        )
+    if rows:
+        print(f"Moved {len(rows)} resume photo(s) into the blob store")
+    # Photos that could not be decoded stay in the column; drop it only once it is empty
+    if conn.scalar(sa.text("SELECT COUNT(*) FROM resumes WHERE photo IS NOT NULL")) == 0:
+        with op.batch_alter_table('resumes') as batch:
+            batch.drop_column('photo')
+
+
+def downgrade() -> None:
+    # Photos stay in the blob store; restoring them inline is not worth it
+    with op.batch_alter_table('resumes') as batch:
+        batch.add_column(sa.Column('photo', sa.String(), nullable=True))
+    op.drop_index('ix_resumes_photo_hash', 'resumes')
+    with op.batch_alter_table('resumes') as batch:
+        batch.drop_column('photo_hash')
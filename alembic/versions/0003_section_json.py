@@ -0,0 +1,86 @@
+"""Validate the resume sections and store them as JSON
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:02:00
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+from pydantic import ValidationError
+import sqlalchemy as sa
+
+from migrations import has_column
+from schemas import SECTION_ITEMS
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SECTION_FIELDS = ('experience', 'education', 'skills', 'projects', 'certifications', 'languages')
+SECTIONS_VERSION = 1
+
+
+def normalize_section(resume_id, field, raw):
+    """Parse a stored section and keep only the items its schema accepts."""
+    if raw is None:
+        return None
+    try:
+        items = json.loads(raw) if isinstance(raw, str) else raw
+    except ValueError:
+        print(f"Dropping unreadable {field} of resume {resume_id}")
+        return "[]"
+    if not isinstance(items, list):
+        return "[]"
+    valid = []
+    for item in items:
+        try:
+            valid.append(SECTION_ITEMS[field](**item).dict(exclude_none=True))
+        except (TypeError, ValidationError):
+            print(f"Dropping invalid {field} item of resume {resume_id}: {item!r}")
+    return json.dumps(valid)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not has_column(conn, 'resumes', 'sections_version'):
+        op.add_column('resumes', sa.Column('sections_version', sa.Integer(), nullable=True))
+    rows = conn.execute(sa.text(
+        f"SELECT id, {', '.join(SECTION_FIELDS)} FROM resumes WHERE sections_version IS NULL"
+    )).fetchall()
+    assignments = ", ".join(f"{field} = :{field}" for field in SECTION_FIELDS)
+    for row in rows:
+        values = {field: normalize_section(row.id, field, getattr(row, field)) for field in SECTION_FIELDS}
+        conn.execute(
+            sa.text(f"UPDATE resumes SET {assignments}, sections_version = :version WHERE id = :id"),
+            {**values, "version": SECTIONS_VERSION, "id": row.id},
+        )
+    if rows:
+        print(f"Converted the sections of {len(rows)} resume(s)")
+    types = {c["name"]: c["type"] for c in sa.inspect(conn).get_columns("resumes")}
+    text_fields = [field for field in SECTION_FIELDS if not isinstance(types[field], sa.JSON)]
+    if not text_fields:
+        return
+    if conn.dialect.name == "postgresql":
+        for field in text_fields:
+            op.execute(f"ALTER TABLE resumes ALTER COLUMN {field} TYPE JSON USING {field}::json")
+    else:
+        # SQLite keeps the text as it is and only records the declared type
+        with op.batch_alter_table('resumes') as batch:
+            for field in text_fields:
+                batch.alter_column(field, type_=sa.JSON(), existing_type=sa.Text())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for field in SECTION_FIELDS:
+            op.execute(f"ALTER TABLE resumes ALTER COLUMN {field} TYPE TEXT USING {field}::text")
+    with op.batch_alter_table('resumes') as batch:
+        if op.get_bind().dialect.name != "postgresql":
+            for field in SECTION_FIELDS:
+                batch.alter_column(field, type_=sa.Text(), existing_type=sa.JSON())
+        batch.drop_column('sections_version')
@@ -0,0 +1,33 @@
+"""Version counter and modification time on resumes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:03:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not has_column(conn, 'resumes', 'version'):
+        op.add_column('resumes', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    if not has_column(conn, 'resumes', 'updated_at'):
+        op.add_column('resumes', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('resumes') as batch:
+        batch.drop_column('updated_at')
+        batch.drop_column('version')
@@ -0,0 +1,52 @@
+"""Render jobs table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:04:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if has_table(op.get_bind(), 'render_jobs'):
+        return
+    op.create_table(
+        'render_jobs',
+        sa.Column('id', sa.String(32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('resume_id', sa.Integer(), nullable=True),
+        sa.Column('theme', sa.String(), nullable=True),
+        sa.Column('status', sa.String(16), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('resume_version', sa.Integer(), nullable=True),
+        sa.Column('result_hash', sa.String(64), nullable=True),
+        sa.Column('result_size', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_render_jobs_user_id', 'render_jobs', ['user_id'])
+    op.create_index('ix_render_jobs_resume_id', 'render_jobs', ['resume_id'])
+    op.create_index('ix_render_jobs_status', 'render_jobs', ['status'])
+    op.create_index('ix_render_jobs_expires_at', 'render_jobs', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('render_jobs')
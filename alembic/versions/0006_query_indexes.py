@@ -0,0 +1,54 @@
+"""Indexes for the queries the app actually runs
+
+Every resume lookup filters on user_id and id, and the list pages through
+a user's resumes in id order: one (user_id, id) index serves them all. The
+render job worker claims jobs by status and next_attempt_at (or started_at,
+for jobs whose lease ran out) and, when jobs expire, looks up other jobs
+sharing the same PDF by result_hash.
+The title index and the single-column indexes duplicating the primary keys
+were never used by a query and only slowed writes down.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 12:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations import has_index
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Removed indexes, as (table, name, columns)
+REDUNDANT = (
+    ('users', 'ix_users_id', ['id']),
+    ('resumes', 'ix_resumes_id', ['id']),
+    ('resumes', 'ix_resumes_title', ['title']),
+    ('render_jobs', 'ix_render_jobs_status', ['status']),
+)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    op.create_index('ix_resumes_user_id_id', 'resumes', ['user_id', 'id'])
+    op.create_index('ix_render_jobs_status_next_attempt_at', 'render_jobs', ['status', 'next_attempt_at'])
+    op.create_index('ix_render_jobs_status_started_at', 'render_jobs', ['status', 'started_at'])
+    op.create_index('ix_render_jobs_result_hash', 'render_jobs', ['result_hash'])
+    for table, name, _ in REDUNDANT:
+        if has_index(conn, table, name):
+            op.drop_index(name, table)
+
+
+def downgrade() -> None:
+    for table, name, columns in REDUNDANT:
+        op.create_index(name, table, columns)
+    op.drop_index('ix_render_jobs_result_hash', 'render_jobs')
+    op.drop_index('ix_render_jobs_status_started_at', 'render_jobs')
+    op.drop_index('ix_render_jobs_status_next_attempt_at', 'render_jobs')
+    op.drop_index('ix_resumes_user_id_id', 'resumes')
@@ -0,0 +1,50 @@
+"""Never reuse resume ids, and give each resume a random render token
+
+Without AUTOINCREMENT, SQLite hands the id of the newest deleted resume to
+the next one created, whose version starts at 1 again, so (id, version)
+could name two different resumes over time. Resumes now use AUTOINCREMENT
+on SQLite (PostgreSQL sequences never reuse values), and every row gets a
+random render_token that the render cache keys and PDF ETags include.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 21:10:00
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not has_column(conn, 'resumes', 'render_token'):
+        op.add_column('resumes', sa.Column('render_token', sa.String(32), nullable=True))
+    ids = conn.execute(sa.text("SELECT id FROM resumes WHERE render_token IS NULL")).scalars().all()
+    if ids:
+        conn.execute(
+            sa.text("UPDATE resumes SET render_token = :token WHERE id = :id"),
+            [{"id": resume_id, "token": uuid.uuid4().hex} for resume_id in ids],
+        )
+    if conn.dialect.name == 'sqlite':
+        # AUTOINCREMENT can only be set by rebuilding the table; the copy keeps
+        # the ids, and SQLite continues counting from the largest one
+        with op.batch_alter_table('resumes', recreate='always', table_kwargs={'sqlite_autoincrement': True}) as batch:
+            batch.alter_column('render_token', existing_type=sa.String(32), nullable=False)
+    else:
+        op.alter_column('resumes', 'render_token', existing_type=sa.String(32), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('resumes', recreate='always', table_kwargs={'sqlite_autoincrement': False}) as batch:
+        batch.drop_column('render_token')
@@ -0,0 +1,93 @@
+# auth_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+# How long a verified token is trusted without looking the user up again.
+# Entries never outlive the token's own expiry.
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user as most endpoints need it: no ORM row attached."""
+    id: int
+    email: str
+
+
+class AuthCache:
+    """Bounded TTL cache from a verified bearer token to its user."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[CurrentUser, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(token)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: CurrentUser, token_expires_at: Optional[float] = None) -> None:
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        expires_in = self.ttl
+        if token_expires_at is not None:
+            expires_in = min(expires_in, token_expires_at - time.time())
+        if expires_in <= 0:
+            return
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (user, time.monotonic() + expires_in)
+            self._by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[0].id]
+
+
+auth_cache = AuthCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
@@ -0,0 +1,70 @@
+# benchmarks/compare.py
+"""
+Compare two render_bench result files:
+
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Exits with status 1 when any case got slower than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return {entry["case"]: entry for entry in report["results"]}
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slowdown of the median PDF time that counts as a regression")
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    regressions = []
+    print(f"{'case':<36} {'pdf ms':>19} {'change':>8} {'bytes':>8} {'builds':>7} {'preview ms':>19}")
+    for case in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[case], candidate[case]
+        if "pdf" not in old and "pdf" not in new and "error_ms" in old and "error_ms" in new:
+            # Both fail: compare how long the render took to fail
+            delta = change(old["error_ms"], new["error_ms"])
+            if delta > args.threshold:
+                regressions.append(case)
+            print(f"{case:<36} {old['error_ms']:8.1f} -> {new['error_ms']:8.1f} {delta:+7.1f}% (failed)")
+            continue
+        if "pdf" not in old or "pdf" not in new:
+            status = "failed" if "pdf" not in new else "fixed"
+            print(f"{case:<36} {status}")
+            if "pdf" not in new and "pdf" in old:
+                regressions.append(case)
+            continue
+        old_pdf, new_pdf = old["pdf"], new["pdf"]
+        delta = change(old_pdf["median_ms"], new_pdf["median_ms"])
+        if delta > args.threshold:
+            regressions.append(case)
+        print(
+            f"{case:<36} {old_pdf['median_ms']:8.1f} -> {new_pdf['median_ms']:8.1f} {delta:+7.1f}%"
+            f" {change(old_pdf['bytes'], new_pdf['bytes']):+7.1f}%"
+            f" {old_pdf['builds']:>3}->{new_pdf['builds']:<3}"
+            f" {old['preview']['median_ms']:8.3f} -> {new['preview']['median_ms']:8.3f}"
+        )
+    for case in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"{case:<36} only in {'baseline' if case in baseline else 'candidate'}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# benchmarks/render_bench.py
+"""
+Render synthetic resumes of every size, with and without photos, through
+every theme, and record how long the PDF and the HTML preview take.
+
+Run from the repository root; it needs nothing beyond requirements.txt and
+no network or database:
+
+    python -m benchmarks.render_bench
+    python -m benchmarks.render_bench --sizes tiny,medium --themes default --repeat 3
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+Each result has the PDF's cold time (first render, photo not yet processed),
+median and best warm times, peak Python memory, output bytes and the number
+of builds needed to fit the page height with the time of each render stage,
+plus the preview's median time. Cases that cannot be rendered record how
+long the render took to fail instead.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import reportlab
+
+from benchmarks.synthetic import PHOTOS, SIZES, make_payload, make_photo
+from pdf_renderer import render_resume_pdf
+from photo_cache import photo_cache
+from preview_renderer import render_resume_html
+from themes import load_themes
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def render_pdf(payload):
+    result = render_resume_pdf(payload)
+    if result.path is not None:
+        os.remove(result.path)
+    return result
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return (time.perf_counter() - start) * 1000, value
+
+
+def bench_pdf(payload, repeat: int) -> dict:
+    photo_cache.clear()
+    cold_ms, result = timed(render_pdf, payload)
+    warm = []
+    for _ in range(repeat):
+        ms, result = timed(render_pdf, payload)
+        warm.append(ms)
+
+    # Measured on its own run: tracing slows everything down
+    tracemalloc.start()
+    try:
+        render_pdf(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "cold_ms": round(cold_ms, 2),
+        "median_ms": round(statistics.median(warm), 2),
+        "min_ms": round(min(warm), 2),
+        "peak_kib": peak // 1024,
+        "bytes": result.size,
+        "builds": result.builds,
+        # Stage breakdown of the last warm render
+        "stages": {stage: round(ms, 2) for stage, ms in result.timings.items()},
+    }
+
+
+def bench_preview(payload, repeat: int) -> dict:
+    html = render_resume_html(payload)
+    times = [timed(render_resume_html, payload)[0] for _ in range(max(repeat, 10))]
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "bytes": len(html.encode()),
+    }
+
+
+def run(sizes, photos, themes, repeat: int) -> list:
+    photo_data = {name: make_photo(pixels) if pixels else None for name, pixels in PHOTOS.items()}
+    results = []
+    for size in sizes:
+        for photo in photos:
+            for theme in themes:
+                payload = make_payload(size, theme, photo_data[photo])
+                entry = {"case": f"{size}/{photo}/{theme}", "size": size, "photo": photo, "theme": theme}
+                start = time.perf_counter()
+                try:
+                    entry["pdf"] = bench_pdf(payload, repeat)
+                except Exception as e:
+                    # Renders are deterministic, so a failing case fails on its
+                    # first (cold) render: this is how long that took to fail
+                    entry["error_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    # ReportLab's layout errors describe the whole flowable tree
+                    entry["error"] = f"{type(e).__name__}: {str(e).splitlines()[0][:120]}"
+                entry["preview"] = bench_preview(payload, repeat)
+                results.append(entry)
+                print(format_entry(entry), flush=True)
+    return results
+
+
+def format_entry(entry: dict) -> str:
+    preview = f"preview {entry['preview']['median_ms']:8.3f} ms"
+    if "pdf" not in entry:
+        return f"{entry['case']:<36} pdf failed after {entry['error_ms']:8.1f} ms ({entry['error']})  {preview}"
+    pdf = entry["pdf"]
+    return (
+        f"{entry['case']:<36} pdf {pdf['median_ms']:8.1f} ms (cold {pdf['cold_ms']:8.1f})"
+        f" {pdf['peak_kib']:7d} KiB {pdf['bytes']:9d} B {pdf['builds']} build(s)  {preview}"
+    )
+
+
+def parse_list(value: str, choices) -> list:
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in choices]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown: {', '.join(unknown)} (choose from {', '.join(choices)})")
+    return items
+
+
+def main(argv=None):
+    themes = list(load_themes())
+    parser = argparse.ArgumentParser(description="Benchmark PDF and preview rendering")
+    parser.add_argument("--sizes", type=lambda v: parse_list(v, SIZES), default=list(SIZES))
+    parser.add_argument("--photos", type=lambda v: parse_list(v, PHOTOS), default=list(PHOTOS))
+    parser.add_argument("--themes", type=lambda v: parse_list(v, themes), default=themes)
+    parser.add_argument("--repeat", type=int, default=5, help="warm renders per case")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    results = run(args.sizes, args.photos, args.themes, args.repeat)
+    report = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "reportlab": reportlab.Version,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# benchmarks/startup_bench.py
+"""
+Measure how long a fresh process takes to import the app, using
+python -X importtime, and check that the PDF stack stays out of it.
+
+Every app worker and every process started by an autoscaler pays this
+import before serving its first request. ReportLab, Pillow and Alembic are
+loaded only when the first render or the startup migration needs them, so
+importing one of them here is a regression:
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --repeat 10 --max-ms 1500 --top 20
+
+Exits with status 1 when a forbidden module is imported or the median
+import time is above --max-ms.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules the app should not import until they are needed
+FORBIDDEN = ("reportlab", "PIL", "alembic")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_profile(target: str) -> list:
+    """(module, self µs, cumulative µs, depth) for every module importing target pulls in, target last."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    modules = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append((name, int(own), int(cumulative), len(indent) // 2))
+    # importtime lists a module after everything it imports, one level deeper;
+    # drop the interpreter's own start-up imports listed before them
+    end = next(i for i, module in enumerate(modules) if module[0] == target and module[3] == 0)
+    start = end
+    while start > 0 and modules[start - 1][3] > 0:
+        start -= 1
+    return modules[start:end + 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's import time")
+    parser.add_argument("--target", default="main", help="module to import (default: main)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    parser.add_argument("--max-ms", type=float, help="fail when the median import takes longer")
+    args = parser.parse_args(argv)
+
+    runs = [import_profile(args.target) for _ in range(args.repeat)]
+    totals = [modules[-1][2] / 1000 for modules in runs]
+    median = statistics.median(totals)
+    modules = runs[totals.index(min(totals, key=lambda total: abs(total - median)))]
+
+    print(f"import {args.target}: median {median:.0f} ms, min {min(totals):.0f} ms over {args.repeat} runs")
+    print("\nSlowest imports (cumulative ms) of the median run:")
+    direct = sorted((m for m in modules if m[3] == 1), key=lambda m: -m[2])
+    for name, _, cumulative, _ in direct[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    failures = []
+    loaded = sorted({name.split(".")[0] for name, *_ in modules} & set(FORBIDDEN))
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    if args.max_ms is not None and median > args.max_ms:
+        failures.append(f"median import time {median:.0f} ms is above {args.max_ms:.0f} ms")
+    for failure in failures:
+        print(f"\nFAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
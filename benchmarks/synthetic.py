@@ -0,0 +1,108 @@
+# benchmarks/synthetic.py
+import io
+import random
+from typing import Optional
+
+from PIL import Image, ImageDraw
+
+from render_executor import RenderPayload
+
+# Items per section for each resume size. "large" comes close to the
+# renderer's three-A4 height limit; "oversize" runs past it, so it measures
+# how long a render takes to fail.
+SIZES = {
+    'tiny': dict(experience=1, education=0, skills=2, projects=0, certifications=0, languages=1, sentences=1),
+    'small': dict(experience=2, education=1, skills=5, projects=1, certifications=1, languages=2, sentences=2),
+    'medium': dict(experience=5, education=2, skills=10, projects=3, certifications=2, languages=3, sentences=3),
+    'large': dict(experience=10, education=3, skills=20, projects=6, certifications=4, languages=4, sentences=4),
+    'oversize': dict(experience=14, education=4, skills=28, projects=8, certifications=6, languages=5, sentences=5),
+}
+
+# Longest side of the generated photo in pixels; None means no photo
+PHOTOS = {
+    'none': None,
+    'small': 400,
+    'large': 2400,
+}
+
+WORDS = (
+    "design build ship scale lead mentor migrate optimise deliver measure "
+    "platform service pipeline customer revenue latency reliability team "
+    "cloud data product release quality security roadmap budget growth"
+).split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def make_photo(size: int, seed: int = 0) -> bytes:
+    """A JPEG with enough detail that it compresses like a real photo."""
+    rng = random.Random(seed)
+    image = Image.new('RGB', (size, size))
+    draw = ImageDraw.Draw(image)
+    for _ in range(200):
+        x, y = rng.randrange(size), rng.randrange(size)
+        radius = rng.randint(size // 40, size // 6)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=colour)
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=85)
+    return buf.getvalue()
+
+
+def make_payload(size: str, theme: str, photo: Optional[bytes] = None, seed: int = 0) -> RenderPayload:
+    """A deterministic resume of the given size, as the render workers receive it."""
+    counts = SIZES[size]
+    rng = random.Random(f"{size}-{seed}")
+    sentences = counts['sentences']
+    return RenderPayload(
+        resume_id=0,
+        theme=theme,
+        full_name="Alex Example",
+        title="Senior Software Engineer",
+        phone="+1 555 0100",
+        email="alex@example.com",
+        city="Springfield",
+        summary=paragraph(rng, sentences),
+        experience=[{
+            'position': f"Engineer {i + 1}",
+            'company': f"Company {i + 1}",
+            'start_date': f"{2000 + i}-01",
+            'end_date': f"{2001 + i}-01",
+            'is_current': i == 0,
+            'description': paragraph(rng, sentences),
+        } for i in range(counts['experience'])],
+        education=[{
+            'degree': f"Degree {i + 1}",
+            'institution': f"University {i + 1}",
+            'start_date': f"{1990 + i * 4}-09",
+            'end_date': f"{1994 + i * 4}-06",
+            'is_current': False,
+            'description': paragraph(rng, max(1, sentences // 2)),
+        } for i in range(counts['education'])],
+        skills=[{
+            'skill': rng.choice(WORDS).capitalize(),
+            'proficiency': rng.choice(["Beginner", "Intermediate", "Expert"]),
+        } for _ in range(counts['skills'])],
+        projects=[{
+            'name': f"Project {i + 1}",
+            'description': paragraph(rng, sentences),
+            'link': f"https://example.com/project-{i + 1}",
+        } for i in range(counts['projects'])],
+        certifications=[{
+            'title': f"Certification {i + 1}",
+            'issuer': f"Issuer {i + 1}",
+            'date': f"{2010 + i}-05",
+        } for i in range(counts['certifications'])],
+        languages=[{
+            'language': f"Language {i + 1}",
+            'proficiency': rng.choice(["Basic", "Fluent", "Native"]),
+        } for i in range(counts['languages'])],
+        photo=photo,
+    )
@@ -0,0 +1,39 @@
+# blob_refs.py
+# Blobs are shared by content: any number of resume photos and render job
+# results can point at the same digest, so a blob is only deleted once no
+# row refers to it. Writers store their blob before committing the row
+# that refers to it and store it again after committing (put_blob and
+# put_blob_file skip blobs already stored); release_blob checks the
+# references again after moving the blob aside. Between the two, a blob is
+# never deleted while a committed row refers to it.
+import os
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from blob_store import restore_blob, retire_blob
+
+
+async def blob_in_use(db: AsyncSession, digest: str) -> bool:
+    for column in (models.Resume.photo_hash, models.RenderJob.result_hash):
+        if await db.scalar(select(column).where(column == digest).limit(1)) is not None:
+            return True
+    return False
+
+
+async def release_blob(db: AsyncSession, digest: Optional[str]) -> None:
+    """Delete a blob if no row refers to it. Call after committing the change that dropped a reference."""
+    if digest is None or await blob_in_use(db, digest):
+        return
+    retired = retire_blob(digest)
+    if retired is None:
+        return
+    # A new reference may have been committed since the first check; end the
+    # read transaction so the second check sees it
+    await db.commit()
+    if await blob_in_use(db, digest):
+        restore_blob(digest, retired)
+    else:
+        os.remove(retired)
@@ -0,0 +1,107 @@
+# blob_store.py
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Optional
+
+# Content-addressed storage for uploaded files: each blob is stored once,
+# under the SHA-256 of its bytes, no matter how many rows reference it.
+BLOB_DIR = os.environ.get("BLOB_DIR", "./blobs")
+
+
+def blob_path(digest: str) -> str:
+    return os.path.join(BLOB_DIR, digest[:2], digest)
+
+
+def put_blob(data: bytes) -> str:
+    """Store the bytes (if not already stored) and return their digest."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = blob_path(digest)
+    if os.path.exists(path):
+        return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial blob
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return digest
+
+
+def put_blob_file(path: str, keep: bool = False) -> str:
+    """
+    Move a file into the store without reading it into memory; returns its
+    digest. With keep, the file is copied and left in place instead.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    target = blob_path(digest)
+    if os.path.exists(target):
+        if not keep:
+            os.remove(path)
+        return digest
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # shutil.move copies when the file is on another filesystem, so go
+    # through a temporary name in the target directory to stay atomic
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        if keep:
+            shutil.copyfile(path, tmp_path)
+        else:
+            shutil.move(path, tmp_path)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest
+
+
+def get_blob(digest: str) -> Optional[bytes]:
+    try:
+        with open(blob_path(digest), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def retire_blob(digest: str) -> Optional[str]:
+    """
+    Move a blob aside, so it is gone from the store but can still be put
+    back. Returns its new path, or None if it was not stored.
+    """
+    path = blob_path(digest)
+    retired = f"{path}.retired-{uuid.uuid4().hex}"
+    try:
+        os.rename(path, retired)
+    except FileNotFoundError:
+        return None
+    return retired
+
+
+def restore_blob(digest: str, retired: str) -> None:
+    """Put back a blob moved aside by retire_blob."""
+    os.replace(retired, blob_path(digest))
+
+
+def sniff_media_type(data: bytes) -> str:
+    """Guess an image's media type from its magic bytes."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
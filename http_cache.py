@@ -0,0 +1,37 @@
+# http_cache.py
+from typing import Optional
+
+
+def make_etag(digest: str) -> str:
+    """Return a strong ETag header value for the given digest."""
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against our ETag.
+    If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etag_matches_strong(if_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-Match header against our ETag.
+    If-Match uses the strong comparison, so a weak (W/) validator never matches.
+    """
+    if not if_match:
+        return False
+    if if_match.strip() == "*":
+        return True
+    return any(candidate.strip() == etag for candidate in if_match.split(","))
@@ -1,52 +1,40 @@
 # main.py
+import asyncio
 import base64
-from fastapi import FastAPI, Depends, HTTPException, Query, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, undefer, undefer_group
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime, timedelta
-from typing import List
-from reportlab.platypus import Image
+from typing import List, Optional
 import jwt
 import models
 import schemas
-from database import SessionLocal, engine, Base
-from passlib.context import CryptContext
+from database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from auth_cache import CurrentUser, auth_cache
+from blob_refs import release_blob
+from blob_store import blob_path, get_blob, put_blob, sniff_media_type
+from http_cache import etag_matches, etag_matches_strong, make_etag
+from metrics import RequestTimingMiddleware, ServerTiming, registry as metrics_registry
+from migrations import upgrade
+from query_stats import QueryStatsMiddleware
+from profiling import ProfileMiddleware, current_profile, profile_path, profile_text, profiling_allowed
+from render_cache import compute_render_key, render_cache
+from password_hasher import HashingQueueFull, password_hasher
+from pdf_spool import clean_spool_dir, iter_bytes, iter_file
+from preview_renderer import PREVIEW_VERSION, render_resume_html
+from prerender import PRERENDER_MODE, last_themes, prerender_debouncer
+from render_jobs import new_job_id, render_job_worker
+from zip_stream import ZipStream
+from render_executor import RenderPayload, RenderQueueFull, RenderTimeout, render_executor, render_payload
+from theme_palettes import THEMES, get_theme_info
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 import os
-
-# Install required package first: pip install reportlab
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER, TA_LEFT
-from fastapi import BackgroundTasks
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-import io
-import json
-from datetime import datetime
-from reportlab.platypus import KeepTogether, FrameBreak
-from reportlab.platypus import Frame, PageTemplate, NextPageTemplate
-
-# ReportLab and Pillow Imports
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as RLImage
-from PIL import Image, ImageDraw
-import base64
-
-from reportlab.pdfgen import canvas
-import math
-
-Base.metadata.create_all(bind=engine)
+from urllib.parse import quote
 
 app = FastAPI()
 
@@ -57,18 +45,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Link", "ETag", "Server-Timing", "X-Profile-Id"],
 )
+app.add_middleware(ProfileMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestTimingMiddleware)
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Mount the static files from the Angular build
-app.mount("/assets", StaticFiles(directory="resume-builder/dist/resume-builder/browser"), name="static")
+# Nothing touches the database or the disk at import time, so process-pool
+# workers and short-lived tooling that import this module start quickly.
+# When several app processes share a database, set RUN_MIGRATIONS=0 and run
+# "python migrations.py" once per deploy instead.
+RUN_MIGRATIONS = os.environ.get("RUN_MIGRATIONS", "1") == "1"
+
+@app.on_event("startup")
+def prepare_storage():
+    if RUN_MIGRATIONS:
+        # Creates or upgrades the schema through the Alembic history
+        upgrade(engine)
+    clean_spool_dir()
+
+@app.on_event("startup")
+def start_render_job_worker():
+    render_job_worker.start()
+
+@app.on_event("shutdown")
+async def shutdown_render_executor():
+    await render_job_worker.stop()
+    prerender_debouncer.cancel_all()
+    render_executor.shutdown()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+# Mount the static files from the Angular build; the directory is checked on
+# the first request rather than at import
+app.mount("/assets", StaticFiles(directory="resume-builder/dist/resume-builder/browser", check_dir=False), name="static")
 
 def get_db():
     db = SessionLocal()
@@ -77,11 +94,19 @@ def get_db():
     finally:
         db.close()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def run_hasher(fn, *args):
+    try:
+        return await fn(*args)
+    except HashingQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -90,7 +115,14 @@ def create_access_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    """
+    Resolve the bearer token to its user. Tokens seen recently are answered
+    from auth_cache without decoding them or querying the database again.
+    """
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -103,1624 +135,820 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == username).first()
-    if user is None:
+    result = await db.execute(select(models.User.id, models.User.email).where(models.User.email == username))
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    user = CurrentUser(id=row.id, email=row.email)
+    auth_cache.put(token, user, payload.get("exp"))
+    return user
+
+async def get_current_db_user(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """The full ORM row of the current user, for endpoints that need more than the id"""
+    user = await db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.id)
+
 # ----- User Endpoints -----
 @app.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(models.User.id).where(models.User.email == user.email))
+    if existing is not None:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_hasher(password_hasher.hash, user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     return db_user
 
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == form_data.username))
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await run_hasher(
+            password_hasher.verify_and_update, form_data.password, user.hashed_password
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash is not None:
+        # The stored hash used other bcrypt parameters; upgrade it now that we know the password
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # ----- Resume Endpoints -----
 @app.post("/resumes/", response_model=schemas.Resume)
-def create_resume(
+async def create_resume(
     resume: schemas.ResumeCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_resume = models.Resume(**resume.dict(), user_id=current_user.id)
+    resume_data = resume.to_columns()
+    photo = resume_data.pop("photo")
+    db_resume = models.Resume(**resume_data, user_id=current_user.id)
+    photo_bytes = apply_photo(db_resume, photo)
     db.add(db_resume)
-    db.commit()
-    db.refresh(db_resume)
+    await db.commit()
+    store_photo_again(photo_bytes)
+    schedule_prerender(current_user.id, db_resume.id)
     return db_resume
 
-@app.get("/resumes/", response_model=List[schemas.Resume])
-def get_resumes(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+# Columns each ResumeSummary field is read from
+SUMMARY_COLUMNS = {
+    "id": ("id",),
+    "title": ("title",),
+    "full_name": ("full_name",),
+    "email": ("email",),
+    "city": ("city",),
+    "photo": ("id", "photo_hash"),
+    "updated_at": ("updated_at",),
+}
+
+@app.get("/resumes/", response_model=List[schemas.ResumeSummary], response_model_exclude_unset=True)
+async def get_resumes(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    after_id: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated ResumeSummary fields to return"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(models.Resume).filter(models.Resume.user_id == current_user.id).all()
+    """
+    List the user's resumes, oldest first, a page at a time. Pages are keyed
+    on the last id seen (after_id), so every page costs the same; when there
+    is another page its URL is sent in the Link header.
+    """
+    if fields:
+        selected = ["id"] + [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+        unknown = [f for f in selected if f not in SUMMARY_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        selected = list(SUMMARY_COLUMNS)
+    columns = {column for field in selected for column in SUMMARY_COLUMNS[field]}
+
+    query = select(models.Resume).options(
+        load_only(*(getattr(models.Resume, column) for column in columns))
+    ).where(models.Resume.user_id == current_user.id)
+    if after_id is not None:
+        query = query.where(models.Resume.id > after_id)
+    result = await db.scalars(query.order_by(models.Resume.id).limit(limit + 1))
+    resumes = result.all()
+
+    if len(resumes) > limit:
+        resumes = resumes[:limit]
+        next_url = request.url.include_query_params(after_id=resumes[-1].id, limit=limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return [
+        schemas.ResumeSummary(**{field: getattr(resume, field) for field in selected})
+        for resume in resumes
+    ]
 
 @app.get("/resumes/{resume_id}", response_model=schemas.Resume)
-def get_resume(
+async def get_resume(
     resume_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resume = db.query(models.Resume).filter(
-        models.Resume.id == resume_id, models.Resume.user_id == current_user.id
-    ).first()
+    if if_none_match is not None:
+        # Polling clients usually have the current version: check it without loading the resume
+        version = await db.scalar(select(models.Resume.version).where(
+            models.Resume.id == resume_id, models.Resume.user_id == current_user.id
+        ))
+        if version is None:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        etag = resume_etag(resume_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    resume = await find_resume(db, resume_id, current_user.id, undefer_group("content"))
     if resume is None:
         raise HTTPException(status_code=404, detail="Resume not found")
+    response.headers["ETag"] = resume_etag(resume.id, resume.version)
     return resume
 
 @app.put("/resumes/{resume_id}", response_model=schemas.Resume)
-def update_resume(
+async def update_resume(
     resume_id: int,
     resume: schemas.ResumeCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_resume = db.query(models.Resume).filter(
-        models.Resume.id == resume_id, models.Resume.user_id == current_user.id
-    ).first()
+    db_resume = await find_resume(db, resume_id, current_user.id, undefer_group("content"))
     if db_resume is None:
         raise HTTPException(status_code=404, detail="Resume not found")
-    for key, value in resume.dict().items():
+    check_if_match(if_match, db_resume)
+    resume_data = resume.to_columns()
+    old_photo_hash = db_resume.photo_hash
+    photo_bytes = apply_photo(db_resume, resume_data.pop("photo"))
+    for key, value in resume_data.items():
         setattr(db_resume, key, value)
-    db.commit()
-    db.refresh(db_resume)
+    await commit_resume(db)
+    store_photo_again(photo_bytes)
+    if db_resume.photo_hash != old_photo_hash:
+        await release_blob(db, old_photo_hash)
+    render_cache.invalidate_resume(resume_id)
+    schedule_prerender(current_user.id, resume_id)
+    response.headers["ETag"] = resume_etag(db_resume.id, db_resume.version)
     return db_resume
 
+@app.patch("/resumes/{resume_id}", response_model=schemas.ResumePatchResult, response_model_exclude_none=True)
+async def patch_resume(
+    resume_id: int,
+    patch: schemas.ResumePatch,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply a partial update: only the fields present in the body are written,
+    and sections can be edited an item at a time through ops.
+    """
+    changes = patch.changed_columns()
+    # Only the sections edited in place have to be read
+    edited_sections = {op.section for op in patch.ops}
+    db_resume = await find_resume(
+        db, resume_id, current_user.id,
+        *(undefer(getattr(models.Resume, section)) for section in edited_sections - changes.keys())
+    )
+    if db_resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    check_if_match(if_match, db_resume)
+
+    old_photo_hash = db_resume.photo_hash
+    photo_bytes = None
+    if "photo" in changes:
+        photo_bytes = apply_photo(db_resume, changes.pop("photo"))
+    for key, value in changes.items():
+        setattr(db_resume, key, value)
+
+    sections = {}
+    for position, op in enumerate(patch.ops):
+        items = sections.get(op.section)
+        if items is None:
+            items = sections[op.section] = list(getattr(db_resume, op.section) or [])
+        if not apply_section_op(items, op):
+            raise HTTPException(
+                status_code=422,
+                detail=f"ops[{position}]: {op.section} has no item at index {op.index}",
+            )
+    for section, items in sections.items():
+        setattr(db_resume, section, items)
+
+    updated = sorted(changes.keys() | sections.keys())
+    photo_changed = db_resume.photo_hash != old_photo_hash
+    if photo_changed:
+        updated.append("photo")
+    if updated:
+        await commit_resume(db)
+        store_photo_again(photo_bytes)
+        if photo_changed:
+            await release_blob(db, old_photo_hash)
+        render_cache.invalidate_resume(resume_id)
+        schedule_prerender(current_user.id, resume_id)
+    response.headers["ETag"] = resume_etag(db_resume.id, db_resume.version)
+    return {
+        "id": db_resume.id,
+        "version": db_resume.version,
+        "updated": updated,
+        "photo": db_resume.photo if photo_changed else None,
+    }
+
+def apply_section_op(items: list, op: schemas.SectionItemOp) -> bool:
+    """Apply one item op to a section's list in place; False if the index is out of range"""
+    if op.op == "add":
+        if op.index is None:
+            items.append(op.item)
+        elif op.index <= len(items):
+            items.insert(op.index, op.item)
+        else:
+            return False
+    elif op.index >= len(items):
+        return False
+    elif op.op == "replace":
+        items[op.index] = op.item
+    else:
+        del items[op.index]
+    return True
+
 @app.delete("/resumes/{resume_id}")
-def delete_resume(
+async def delete_resume(
     resume_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    if_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resume = db.query(models.Resume).filter(
-        models.Resume.id == resume_id, models.Resume.user_id == current_user.id
-    ).first()
+    resume = await find_resume(db, resume_id, current_user.id)
     if resume is None:
         raise HTTPException(status_code=404, detail="Resume not found")
-    db.delete(resume)
-    db.commit()
+    check_if_match(if_match, resume)
+    await db.delete(resume)
+    await commit_resume(db)
+    await release_blob(db, resume.photo_hash)
+    render_cache.invalidate_resume(resume_id)
+    prerender_debouncer.cancel(resume_id)
+    last_themes.forget_resume(resume_id)
     return {"message": "Resume deleted"}
 
-def round_corners(image, radius=40):
+def resume_etag(resume_id: int, version: int) -> str:
+    return make_etag(f"resume-{resume_id}-v{version}")
+
+def check_if_match(if_match: Optional[str], resume: models.Resume):
+    """Reject a write made against an older version of the resume"""
+    if if_match is not None and not etag_matches_strong(if_match, resume_etag(resume.id, resume.version)):
+        raise HTTPException(status_code=412, detail="Resume has been modified since it was read")
+
+async def commit_resume(db: AsyncSession):
+    try:
+        await db.commit()
+    except StaleDataError:
+        # Another request updated the resume between our read and our write
+        await db.rollback()
+        raise HTTPException(status_code=412, detail="Resume has been modified since it was read")
+
+# Largest photo accepted, in decoded bytes; render workers also refuse
+# photos above PHOTO_MAX_PIXELS (photo_cache.py) before decoding them
+PHOTO_MAX_BYTES = int(os.environ.get("PHOTO_MAX_BYTES", 5 * 1024 * 1024))
+
+def apply_photo(db_resume: models.Resume, photo: Optional[str]) -> Optional[bytes]:
     """
-    تابعی برای گرد کردن گوشه‌های تصویر پروفایل. 
-    اگر عکس نهایی گوشه‌گرد نمی‌خواهید، این تابع را حذف کنید.
+    Store a newly uploaded data-URL photo in the blob store and point the
+    resume at it, returning the photo's bytes. Clients send back the photo
+    URL they were given when the photo did not change, which leaves it as it
+    is; null removes the photo.
     """
-    circle = Image.new('L', (radius*2, radius*2), 0)
-    draw = ImageDraw.Draw(circle)
-    draw.ellipse((0, 0, radius*2, radius*2), fill=255)
-    alpha = Image.new('L', image.size, 255)
-    w, h = image.size
-
-    alpha.paste(circle.crop((0,0,radius,radius)), (0, 0))
-    alpha.paste(circle.crop((radius,0,radius*2,radius)), (w-radius, 0))
-    alpha.paste(circle.crop((0,radius,radius,radius*2)), (0, h-radius))
-    alpha.paste(circle.crop((radius,radius,radius*2,radius*2)), (w-radius, h-radius))
-    image.putalpha(alpha)
-    return image
-
-def draw_vertical_line(canvas, doc, line_color=colors.HexColor('#AAAAAA')):
-    """Draw a vertical line for the two-column layout"""
-    height = doc.pagesize[1]  # Get page height
-    x = 2.7 * inch  # Position for vertical line (adjust based on your column width)
-    
-    # Draw line from top to bottom of page
-    canvas.setStrokeColor(line_color)
-    canvas.setLineWidth(0.5)
-    canvas.line(x, 30, x, height - 30)
-
-class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        canvas.Canvas.__init__(self, *args, **kwargs)
-        self._saved_page_states = []
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        """Add page info to each page (page x of y)"""
-        num_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(num_pages)
-            canvas.Canvas.showPage(self)
-        canvas.Canvas.save(self)
-
-    def draw_page_number(self, page_count):
-        # Only draw page numbers if there are multiple pages
-        if page_count > 1:
-            self.setFont("Helvetica", 8)
-            self.drawRightString(
-                A4[0] - 20,
-                20,
-                f"Page {self._pageNumber} of {page_count}"
+    if photo is None:
+        db_resume.photo_hash = None
+    elif photo.startswith('data:image'):
+        try:
+            _, encoded = photo.split(',', 1)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid photo data")
+        # Checked on the encoded length so an oversized photo is never decoded
+        if len(encoded) // 4 * 3 > PHOTO_MAX_BYTES:
+            raise HTTPException(
+                status_code=413, detail=f"Photo is too large (at most {PHOTO_MAX_BYTES // (1024 * 1024)} MB)"
             )
+        try:
+            photo_bytes = base64.b64decode(encoded, validate=True)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid photo data")
+        if not photo_bytes:
+            raise HTTPException(status_code=400, detail="Invalid photo data")
+        db_resume.photo_hash = put_blob(photo_bytes)
+        return photo_bytes
+    return None
+
+def store_photo_again(photo_bytes: Optional[bytes]):
+    """
+    Store an uploaded photo once more after committing the resume that
+    refers to it: a release_blob of the same photo, seeing no reference
+    before the commit, may have deleted it in the meantime.
+    """
+    if photo_bytes is not None:
+        put_blob(photo_bytes)
+
+async def find_resume(db: AsyncSession, resume_id: int, user_id: int, *options) -> Optional[models.Resume]:
+    """Load one of the user's resumes, or None if it does not exist or is not theirs"""
+    result = await db.scalars(
+        select(models.Resume).options(*options).where(
+            models.Resume.id == resume_id, models.Resume.user_id == user_id
+        )
+    )
+    return result.first()
+
+@app.get("/resumes/{resume_id}/photo")
+def get_resume_photo(
+    resume_id: int,
+    v: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    row = db.query(models.Resume.photo_hash).filter(
+        models.Resume.id == resume_id, models.Resume.user_id == current_user.id
+    ).first()
+    if row is None or row.photo_hash is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    photo_hash = row.photo_hash
+    headers = {"ETag": make_etag(photo_hash)}
+    # URLs carrying the photo's version (see Resume.photo) never change content;
+    # a shorter prefix could match the next photo too, so it must be exact
+    if v == photo_hash[:models.PHOTO_VERSION_CHARS]:
+        headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        headers["Cache-Control"] = "private, no-cache"
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    photo_bytes = get_blob(photo_hash)
+    if photo_bytes is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return Response(content=photo_bytes, media_type=sniff_media_type(photo_bytes), headers=headers)
 
 @app.get("/resumes/{resume_id}/pdf")
 async def download_resume_pdf(
     resume_id: int,
-    background_tasks: BackgroundTasks,
     theme: str = Query(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
+    timing = ServerTiming()
     try:
-        resume = db.query(models.Resume).filter(
-            models.Resume.id == resume_id,
-            models.Resume.user_id == current_user.id
-        ).first()
+        # Taken before the resume is read, so a render of a resume that is
+        # updated or deleted meanwhile is not stored
+        cache_epoch = render_cache.epoch()
+        # The content columns stay deferred until a render actually needs them
+        with timing.stage("db", "Resume lookup"):
+            resume = await find_resume(db, resume_id, current_user.id)
         if resume is None:
             raise HTTPException(status_code=404, detail="Resume not found")
 
-        timestamp = int(datetime.now().timestamp())
-        filename = f"temp_resume_{resume_id}_{timestamp}.pdf"
-
         name = resume.full_name or ""
-        job_title = resume.title or ""
-        phone = resume.phone or ""
-        email = resume.email or ""
-        city = resume.city or ""
-        summary_text = resume.summary or ""
-        photo_data = resume.photo
-
-        # Define theme outside the try_build_pdf function
-        selected_theme = theme or ""
-        print(f"Selected theme: {selected_theme}")  # Debug log
-
-        def safe_load_json(json_str):
-            if not json_str:
-                return []
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {e}")
-                return []
-            except Exception as e:
-                print(f"Unexpected error loading JSON: {e}")
-                return []
 
+        # Unknown themes render as the default one, so they share its renders
+        selected_theme = get_theme_info(theme).name
+        print(f"Selected theme: {selected_theme}")  # Debug log
+        last_themes.remember(current_user.id, resume_id, selected_theme)
+
+        # A resume version and theme always render to the same PDF, so the
+        # key doubles as a strong ETag and as the render cache key.
+        render_key = compute_render_key(resume, selected_theme)
+        response_headers = {
+            "ETag": make_etag(render_key),
+            "Cache-Control": "private, no-cache",
+        }
+        if etag_matches(if_none_match, response_headers["ETag"]):
+            return Response(status_code=304, headers=response_headers)
+
+        download_name = f"{name.replace(' ', '_')}_{selected_theme}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        response_headers["Content-Disposition"] = attachment_disposition(download_name)
+
+        with timing.stage("cache", "Render cache lookup"):
+            # A profiled request always renders: a cache hit has nothing to profile
+            cached_pdf = render_cache.get(render_key) if current_profile.get() is None else None
+        if cached_pdf is not None:
+            response_headers["Server-Timing"] = timing.header()
+            return pdf_response(iter_bytes(cached_pdf), len(cached_pdf), response_headers)
+
+        with timing.stage("load", "Resume content and photo"):
+            resume = await find_resume(db, resume_id, current_user.id, undefer_group("content"))
+            if resume is None:
+                # Deleted since the lookup above
+                raise HTTPException(status_code=404, detail="Resume not found")
+            payload = render_payload(resume, selected_theme)
         try:
-            experiences = safe_load_json(resume.experience)
-            educations = safe_load_json(resume.education)
-            skills_list = safe_load_json(resume.skills)
-            projects = safe_load_json(resume.projects)
-            certifications = safe_load_json(resume.certifications)
-            languages = safe_load_json(resume.languages)
-        except Exception as e:
-            print(f"Error loading resume data: {e}")
-            experiences = []
-            educations = []
-            skills_list = []
-            projects = []
-            certifications = []
-            languages = []
-
-        def try_build_pdf(height_multiplier=1.0):
-            try:
-                # Create custom page size
-                custom_page_size = (A4[0], A4[1] * height_multiplier)
-                
-                # Create the PDF document with custom settings
-                doc = SimpleDocTemplate(
-                    filename,
-                    pagesize=custom_page_size,
-                    rightMargin=10*mm,
-                    leftMargin=10*mm,
-                    topMargin=0*mm,
-                    bottomMargin=0*mm,
-                    allowSplitting=0,  # Disable page splitting
-                    displayDocTitle=True,
-                    pageCompression=0,  # Disable page compression
-                    showBoundary=0,  # Hide page boundaries
-                )
-
-                # Create a basic template for single page
-                frame = Frame(
-                    doc.leftMargin, 
-                    doc.bottomMargin,
-                    doc.width,
-                    doc.height,
-                    leftPadding=0,
-                    rightPadding=0,
-                    topPadding=0,
-                    bottomPadding=0,
-                    showBoundary=0,
-                    id='normal'
-                )
-
-                # Create a template that uses the frame
-                template = PageTemplate(
-                    id='OneCol',
-                    frames=[frame],
-                    onPage=lambda canvas, doc: None
-                )
-                doc.addPageTemplates([template])
-
-                # Get the default styles from ReportLab
-                styles = getSampleStyleSheet()
-
-                # Define common colors
-                line_color = colors.HexColor('#999999')
-                vertical_line_color = colors.HexColor('#AAAAAA')
-                light_blue = colors.HexColor('#E3F2FD')
-                primary_blue = colors.HexColor('#1E88E5')
-                dark_blue = colors.HexColor('#1565C0')
-                
-                # Nature Green theme colors
-                nature_green = colors.HexColor('#4CAF50')  # Main green
-                light_green = colors.HexColor('#E8F5E9')  # Light green for background
-                dark_green = colors.HexColor('#2E7D32')   # Dark green for headings
-                leaf_green = colors.HexColor('#81C784')   # Accent green
-
-                # Coral Sunset theme colors
-                coral_main = colors.HexColor('#FF7F50')  # Main coral color
-                coral_light = colors.HexColor('#FFE4E1')  # Light coral for background
-                coral_dark = colors.HexColor('#FF4433')   # Dark coral for accents
-                coral_text = colors.HexColor('#4A4A4A')   # Dark gray for text
-
-                # Initialize elements list
-                elements = []
-
-                # Coral Sunset theme styles
-                coral_name_style = ParagraphStyle(
-                    'CoralNameStyle',
-                    parent=styles['Heading1'],
-                    fontSize=24,
-                    leading=28,
-                    textColor=coral_dark,
-                    spaceAfter=6,
-                    fontName='Helvetica-Bold'
-                )
-                coral_title_style = ParagraphStyle(
-                    'CoralTitleStyle',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=coral_main,
-                    spaceAfter=12
-                )
-                coral_contact_style = ParagraphStyle(
-                    'CoralContactStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    textColor=coral_text,
-                    leading=12
-                )
-                coral_section_heading = ParagraphStyle(
-                    'CoralSectionHeading',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=coral_dark,
-                    spaceBefore=12,
-                    spaceAfter=6,
-                    borderColor=coral_main,
-                    borderWidth=0.5,
-                    borderPadding=4,
-                    borderRadius=2
-                )
-                coral_body_style = ParagraphStyle(
-                    'CoralBodyStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=14,
-                    textColor=coral_text
-                )
-                coral_info_style = ParagraphStyle(
-                    'CoralInfoStyle',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=coral_main
-                )
-
-                # Nature Green theme styles
-                green_name_style = ParagraphStyle(
-                    'GreenNameStyle',
-                    parent=styles['Heading1'],
-                    fontSize=24,
-                    leading=28,
-                    textColor=dark_green,
-                    spaceAfter=6,
-                    fontName='Helvetica-Bold'
-                )
-                green_title_style = ParagraphStyle(
-                    'GreenTitleStyle',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=nature_green,
-                    spaceAfter=12
-                )
-                green_contact_style = ParagraphStyle(
-                    'GreenContactStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    textColor=colors.HexColor('#555555'),
-                    leading=12
-                )
-                green_section_heading = ParagraphStyle(
-                    'GreenSectionHeading',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=dark_green,
-                    spaceBefore=12,
-                    spaceAfter=6,
-                    borderColor=leaf_green,
-                    borderWidth=0.5,
-                    borderPadding=4,
-                    borderRadius=2
-                )
-                green_body_style = ParagraphStyle(
-                    'GreenBodyStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=14,
-                    textColor=colors.HexColor('#333333')
-                )
-                green_info_style = ParagraphStyle(
-                    'GreenInfoStyle',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=nature_green
-                )
-
-                # Modern Blue theme styles
-                blue_name_style = ParagraphStyle(
-                    'BlueNameStyle',
-                    parent=styles['Heading1'],
-                    fontSize=24,
-                    leading=28,
-                    textColor=dark_blue,
-                    spaceAfter=6
-                )
-                blue_title_style = ParagraphStyle(
-                    'BlueTitleStyle',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=primary_blue,
-                    spaceAfter=12
-                )
-                blue_contact_style = ParagraphStyle(
-                    'BlueContactStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    textColor=colors.HexColor('#555555'),
-                    leading=12
-                )
-                blue_section_heading = ParagraphStyle(
-                    'BlueSectionHeading',
-                    parent=styles['Heading2'],
-                    fontSize=16,
-                    textColor=dark_blue,
-                    spaceBefore=15,
-                    spaceAfter=8,
-                    borderColor=primary_blue,
-                    borderWidth=1,
-                    borderPadding=5,
-                    borderRadius=3
-                )
-                blue_body_style = ParagraphStyle(
-                    'BlueBodyStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=14,
-                    textColor=colors.HexColor('#333333')
-                )
-                blue_info_style = ParagraphStyle(
-                    'BlueInfoStyle',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=primary_blue
-                )
-
-                # Elegant Dark theme styles
-                name_style_dark = ParagraphStyle(
-                    'NameStyleDark',
-                    parent=styles['Heading1'],
-                    fontSize=20,
-                    leading=24,
-                    textColor=colors.HexColor('#FFFFFF'),
-                    spaceAfter=6
-                )
-                title_style_dark = ParagraphStyle(
-                    'TitleStyleDark',
-                    parent=styles['Heading2'],
-                    fontSize=12,
-                    textColor=colors.HexColor('#DDDDDD'),
-                    spaceAfter=4
-                )
-                contact_style_dark = ParagraphStyle(
-                    'ContactStyleDark',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    textColor=colors.HexColor('#EEEEEE'),
-                    leading=12
-                )
-                section_heading_style_dark = ParagraphStyle(
-                    'SectionHeadingDark',
-                    parent=styles['Heading2'],
-                    fontSize=12,
-                    textColor=colors.HexColor('#333333'),
-                    backColor=colors.HexColor('#F0F0F0'),
-                    spaceBefore=8,
-                    spaceAfter=6,
-                    leftIndent=4,
-                    rightIndent=4
-                )
-                body_style_dark = ParagraphStyle(
-                    'BodyStyleDark',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=14,
-                    textColor=colors.HexColor('#444444')
-                )
-                info_style_dark = ParagraphStyle(
-                    'InfoStyleDark',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=colors.HexColor('#555555')
-                )
-
-                # Creative Purple theme styles
-                left_heading_style = ParagraphStyle(
-                    'LeftHeadingStyle',
-                    parent=styles['Heading2'],
-                    fontSize=12,
-                    leading=14,
-                    textColor=colors.HexColor('#FFFFFF'),
-                    spaceAfter=5
-                )
-                left_body_style = ParagraphStyle(
-                    'LeftBodyStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=12,
-                    textColor=colors.HexColor('#FFFFFF')
-                )
-                left_name_style = ParagraphStyle(
-                    'LeftNameStyle',
-                    parent=styles['Heading1'],
-                    fontSize=16,
-                    leading=20,
-                    textColor=colors.HexColor('#FFFFFF'),
-                    alignment=1,  # Center alignment
-                    spaceAfter=6
-                )
-                right_name_style = ParagraphStyle(
-                    'RightNameStyle',
-                    parent=styles['Heading1'],
-                    fontSize=18,
-                    textColor=colors.HexColor('#000000'),
-                    spaceAfter=4
-                )
-                right_title_style = ParagraphStyle(
-                    'RightTitleStyle',
-                    parent=styles['Heading2'],
-                    fontSize=12,
-                    textColor=colors.HexColor('#555555'),
-                    spaceAfter=6
-                )
-                right_body_style = ParagraphStyle(
-                    'RightBodyStyle',
-                    parent=styles['Normal'],
-                    fontSize=10,
-                    leading=14,
-                    textColor=colors.HexColor('#333333')
-                )
-                right_section_heading = ParagraphStyle(
-                    'RightSectionHeading',
-                    parent=styles['Heading2'],
-                    fontSize=14,
-                    textColor=colors.HexColor('#4B0082'),  # Purple accent
-                    spaceBefore=12,
-                    spaceAfter=6
-                )
-                right_info_style = ParagraphStyle(
-                    'RightInfoStyle',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=colors.HexColor('#777777')
-                )
-
-                if selected_theme == "coral-sunset":
-                    # Create header content
-                    header_content = []
-                    if name:
-                        header_content.append(Paragraph(name, coral_name_style))
-                    if job_title:
-                        header_content.append(Paragraph(job_title, coral_title_style))
-
-                    # Contact info
-                    contact_items = []
-                    if city: contact_items.append(city)
-                    if phone: contact_items.append(phone)
-                    if email: contact_items.append(email)
-                    if contact_items:
-                        contact_str = " | ".join(contact_items)
-                        header_content.append(Paragraph(contact_str, coral_contact_style))
-
-                    # Create left and right columns
-                    left_column = []
-                    right_column = []
-
-                    # Profile Photo
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-                            
-                            max_size = 1.2 * inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-                            
-                            left_column.append(profile_img)
-                            left_column.append(Spacer(1, 15))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_column.append(Paragraph("Profile", coral_section_heading))
-                        left_column.append(Paragraph(summary_text, coral_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Skills
-                    if skills_list:
-                        left_column.append(Paragraph("Skills", coral_section_heading))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_column.append(Paragraph("• " + skill_line, coral_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Languages
-                    if languages:
-                        left_column.append(Paragraph("Languages", coral_section_heading))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_column.append(Paragraph(f"• {lang_name} - {prof}", coral_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Experience
-                    if experiences:
-                        right_column.append(Paragraph("Experience", coral_section_heading))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{pos}</b>", coral_body_style))
-                            right_column.append(Paragraph(comp, coral_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", coral_info_style))
-                            if desc.strip():
-                                right_column.append(Paragraph(desc, coral_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_column.append(Paragraph("Education", coral_section_heading))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{deg}</b>", coral_body_style))
-                            right_column.append(Paragraph(inst, coral_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", coral_info_style))
-                            if dsc.strip():
-                                right_column.append(Paragraph(dsc, coral_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_column.append(Paragraph("Projects", coral_section_heading))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_column.append(Paragraph(f"<b>{proj_name}</b>", coral_body_style))
-                            if link:
-                                right_column.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", coral_info_style))
-                            if description.strip():
-                                right_column.append(Paragraph(description, coral_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_column.append(Paragraph("Certifications", coral_section_heading))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_column.append(Paragraph(f"<b>{ctitle}</b>", coral_body_style))
-                            right_column.append(Paragraph(f"Issuer: {issuer}", coral_info_style))
-                            right_column.append(Paragraph(f"Date: {cdate}", coral_info_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Create a single table for both header and content
-                    main_table_data = [
-                        # Header row with coral background
-                        [Table([[cell] for cell in header_content], 
-                              colWidths=[doc.width],
-                              style=TableStyle([
-                                  ('BACKGROUND', (0, 0), (-1, -1), coral_light),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 15),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-                                  ('TOPPADDING', (0, 0), (-1, -1), 20),
-                                  ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-                                  ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                              ]))],
-                        # Content row with two columns
-                        [Table([[left_column, right_column]], 
-                              colWidths=[doc.width * 0.35, doc.width * 0.65],
-                              style=TableStyle([
-                                  ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 15),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-                                  ('LINEBEFORE', (1, 0), (1, -1), 0.5, coral_main),
-                              ]))]
-                    ]
-
-                    # Create the main table
-                    main_table = Table(main_table_data, colWidths=[doc.width])
-                    main_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
-
-                    elements.append(main_table)
-
-                elif selected_theme == "nature-green":
-                    # Create header content
-                    header_content = []
-                    if name:
-                        header_content.append(Paragraph(name, green_name_style))
-                    if job_title:
-                        header_content.append(Paragraph(job_title, green_title_style))
-
-                    # Contact info
-                    contact_items = []
-                    if city: contact_items.append(city)
-                    if phone: contact_items.append(phone)
-                    if email: contact_items.append(email)
-                    if contact_items:
-                        contact_str = " | ".join(contact_items)
-                        header_content.append(Paragraph(contact_str, green_contact_style))
-
-                    # Create left and right columns
-                    left_column = []
-                    right_column = []
-
-                    # Profile Photo
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-                            
-                            max_size = 1.2 * inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-                            
-                            left_column.append(profile_img)
-                            left_column.append(Spacer(1, 15))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_column.append(Paragraph("Profile", green_section_heading))
-                        left_column.append(Paragraph(summary_text, green_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Skills
-                    if skills_list:
-                        left_column.append(Paragraph("Skills", green_section_heading))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_column.append(Paragraph("• " + skill_line, green_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Languages
-                    if languages:
-                        left_column.append(Paragraph("Languages", green_section_heading))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_column.append(Paragraph(f"• {lang_name} - {prof}", green_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Experience
-                    if experiences:
-                        right_column.append(Paragraph("Experience", green_section_heading))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{pos}</b>", green_body_style))
-                            right_column.append(Paragraph(comp, green_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", green_info_style))
-                            if desc.strip():
-                                right_column.append(Paragraph(desc, green_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_column.append(Paragraph("Education", green_section_heading))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{deg}</b>", green_body_style))
-                            right_column.append(Paragraph(inst, green_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", green_info_style))
-                            if dsc.strip():
-                                right_column.append(Paragraph(dsc, green_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_column.append(Paragraph("Projects", green_section_heading))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_column.append(Paragraph(f"<b>{proj_name}</b>", green_body_style))
-                            if link:
-                                right_column.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", green_info_style))
-                            if description.strip():
-                                right_column.append(Paragraph(description, green_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_column.append(Paragraph("Certifications", green_section_heading))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_column.append(Paragraph(f"<b>{ctitle}</b>", green_body_style))
-                            right_column.append(Paragraph(f"Issuer: {issuer}", green_info_style))
-                            right_column.append(Paragraph(f"Date: {cdate}", green_info_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Create a single table for both header and content
-                    main_table_data = [
-                        # Header row with light green background
-                        [Table([[cell] for cell in header_content], 
-                              colWidths=[doc.width],
-                              style=TableStyle([
-                                  ('BACKGROUND', (0, 0), (-1, -1), light_green),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 15),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-                                  ('TOPPADDING', (0, 0), (-1, -1), 20),
-                                  ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-                                  ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                              ]))],
-                        # Content row with two columns
-                        [Table([[left_column, right_column]], 
-                              colWidths=[doc.width * 0.35, doc.width * 0.65],
-                              style=TableStyle([
-                                  ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 15),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-                                  ('LINEBEFORE', (1, 0), (1, -1), 0.5, leaf_green),
-                              ]))]
-                    ]
-
-                    # Create the main table
-                    main_table = Table(main_table_data, colWidths=[doc.width])
-                    main_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
-
-                    elements.append(main_table)
-
-                elif selected_theme == "modern-blue":
-                    # Create a single table for all content
-                    header_content = []
-                    if name:
-                        header_content.append(Paragraph(name, blue_name_style))
-                    if job_title:
-                        header_content.append(Paragraph(job_title, blue_title_style))
-
-                    # Contact info
-                    contact_items = []
-                    if city: contact_items.append(city)
-                    if phone: contact_items.append(phone)
-                    if email: contact_items.append(email)
-                    if contact_items:
-                        contact_str = " | ".join(contact_items)
-                        header_content.append(Paragraph(contact_str, blue_contact_style))
-
-                    # Create left and right columns
-                    left_column = []
-                    right_column = []
-
-                    # Profile Photo (if available)
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-                            
-                            max_size = 1.2 * inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-                            
-                            left_column.append(profile_img)
-                            left_column.append(Spacer(1, 15))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Add other content to columns
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_column.append(Paragraph("Profile", blue_section_heading))
-                        left_column.append(Paragraph(summary_text, blue_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Skills
-                    if skills_list:
-                        left_column.append(Paragraph("Skills", blue_section_heading))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_column.append(Paragraph("• " + skill_line, blue_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Languages
-                    if languages:
-                        left_column.append(Paragraph("Languages", blue_section_heading))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_column.append(Paragraph(f"• {lang_name} - {prof}", blue_body_style))
-                        left_column.append(Spacer(1, 15))
-
-                    # Experience
-                    if experiences:
-                        right_column.append(Paragraph("Experience", blue_section_heading))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{pos}</b>", blue_body_style))
-                            right_column.append(Paragraph(comp, blue_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", blue_info_style))
-                            if desc.strip():
-                                right_column.append(Paragraph(desc, blue_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_column.append(Paragraph("Education", blue_section_heading))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_column.append(Paragraph(f"<b>{deg}</b>", blue_body_style))
-                            right_column.append(Paragraph(inst, blue_info_style))
-                            right_column.append(Paragraph(f"{sd} - {ed}", blue_info_style))
-                            if dsc.strip():
-                                right_column.append(Paragraph(dsc, blue_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_column.append(Paragraph("Projects", blue_section_heading))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_column.append(Paragraph(f"<b>{proj_name}</b>", blue_body_style))
-                            if link:
-                                right_column.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", blue_info_style))
-                            if description.strip():
-                                right_column.append(Paragraph(description, blue_body_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_column.append(Paragraph("Certifications", blue_section_heading))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_column.append(Paragraph(f"<b>{ctitle}</b>", blue_body_style))
-                            right_column.append(Paragraph(f"Issuer: {issuer}", blue_info_style))
-                            right_column.append(Paragraph(f"Date: {cdate}", blue_info_style))
-                            right_column.append(Spacer(1, 10))
-
-                    # Create a single table for both header and content
-                    main_table_data = [
-                        # Header row with blue background
-                        [Table([[cell] for cell in header_content], 
-                              colWidths=[doc.width],
-                              style=TableStyle([
-                                  ('BACKGROUND', (0, 0), (-1, -1), light_blue),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                                  ('TOPPADDING', (0, 0), (-1, -1), 20),
-                                  ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-                                  ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                              ]))],
-                        # Content row with two columns
-                        [Table([[left_column, right_column]], 
-                              colWidths=[doc.width * 0.35, doc.width * 0.65],
-                              style=TableStyle([
-                                  ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                                  ('LEFTPADDING', (0, 0), (-1, -1), 20),
-                                  ('RIGHTPADDING', (0, 0), (-1, -1), 20),
-                                  ('LINEBEFORE', (1, 0), (1, -1), 0.5, vertical_line_color),
-                              ]))]
-                    ]
-
-                    # Create the main table
-                    main_table = Table(main_table_data, colWidths=[doc.width])
-                    main_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
-
-                    elements.append(main_table)
-
-                elif selected_theme == "creative-purple":
-                    # Create left column flowables
-                    left_col_flowables = []
-
-                    # Profile Photo
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-
-                            max_size = 1.2 * inch  # Reduced from 1.5 inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-
-                            left_col_flowables.append(profile_img)
-                            left_col_flowables.append(Spacer(1, 10))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_col_flowables.append(Paragraph("PROFILE", left_heading_style))
-                        left_col_flowables.append(Paragraph(summary_text, left_body_style))
-                        left_col_flowables.append(Spacer(1, 10))
-
-                    # Skills
-                    if skills_list:
-                        left_col_flowables.append(Paragraph("SKILLS", left_heading_style))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_col_flowables.append(Paragraph("• " + skill_line, left_body_style))
-                        left_col_flowables.append(Spacer(1, 10))
-
-                    # Languages
-                    if languages:
-                        left_col_flowables.append(Paragraph("LANGUAGES", left_heading_style))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_col_flowables.append(Paragraph(f"• {lang_name} - {prof}", left_body_style))
-                        left_col_flowables.append(Spacer(1, 10))
-
-                    # Create left column table with purple background
-                    left_table = Table([[flow] for flow in left_col_flowables], 
-                                     colWidths=[2.2 * inch],
-                                     splitByRow=True)  # Enable splitting
-                    left_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#4B0082')),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 20),     # Reduced from 15
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 8),    # Reduced from 10
-                        ('TOPPADDING', (0, 0), (-1, -1), 8),      # Reduced from 10
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),   # Reduced from 10
-                    ]))
-
-                    # Create right column flowables
-                    right_col_flowables = []
-
-                    # Name & Job Title
-                    if name:
-                        right_col_flowables.append(Paragraph(name, right_name_style))
-                    if job_title:
-                        right_col_flowables.append(Paragraph(job_title, right_title_style))
-
-                    # Contact Info
-                    contact_items = []
-                    if city: contact_items.append(city)
-                    if phone: contact_items.append(phone)
-                    if email: contact_items.append(email)
-                    if contact_items:
-                        contact_str = " | ".join(contact_items)
-                        right_col_flowables.append(Paragraph(contact_str, right_body_style))
-                        right_col_flowables.append(Spacer(1, 8))
-
-                    # Experience
-                    if experiences:
-                        right_col_flowables.append(Paragraph("Experience", right_section_heading))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_col_flowables.append(Paragraph(f"<b>{pos}</b> - {comp}", right_body_style))
-                            date_info = f"{sd} - {ed}"
-                            right_col_flowables.append(Paragraph(date_info, right_info_style))
-                            if desc.strip():
-                                right_col_flowables.append(Paragraph(desc, right_body_style))
-                            right_col_flowables.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_col_flowables.append(Paragraph("Education", right_section_heading))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_col_flowables.append(Paragraph(f"<b>{deg}</b> - {inst}", right_body_style))
-                            date_info = f"{sd} - {ed}"
-                            right_col_flowables.append(Paragraph(date_info, right_info_style))
-                            if dsc.strip():
-                                right_col_flowables.append(Paragraph(dsc, right_body_style))
-                            right_col_flowables.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_col_flowables.append(Paragraph("Projects", right_section_heading))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_col_flowables.append(Paragraph(f"<b>{proj_name}</b>", right_body_style))
-                            if link:
-                                right_col_flowables.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", right_body_style))
-                            if description.strip():
-                                right_col_flowables.append(Paragraph(description, right_body_style))
-                            right_col_flowables.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_col_flowables.append(Paragraph("Certifications", right_section_heading))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_col_flowables.append(Paragraph(f"<b>{ctitle}</b>", right_body_style))
-                            right_col_flowables.append(Paragraph(f"Issuer: {issuer}", right_body_style))
-                            right_col_flowables.append(Paragraph(f"Date: {cdate}", right_body_style))
-                            right_col_flowables.append(Spacer(1, 10))
-
-                    # Add extra space to ensure left column background extends to bottom
-                    left_col_flowables.append(Spacer(1, 200))  # Add extra space at bottom
-
-                    # Combine into a two-column table with background color
-                    main_table = Table([
-                        [left_table, right_col_flowables]
-                    ], colWidths=[2.7 * inch, 5.6 * inch])  # Adjusted widths
-                    main_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('LEFTPADDING', (0, 0), (0, -1), 0),    # Left column padding
-                        ('RIGHTPADDING', (-1, 0), (-1, -1), 8), # Right column padding
-                        ('TOPPADDING', (0, 0), (-1, -1), 0),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#4B0082')),  # Purple background for entire left column
-                    ]))
-
-                    elements.append(main_table)
-
-                elif selected_theme == "elegant-dark":
-                    # Create left and right columns
-                    left_elements = []
-                    right_elements = []
-
-                    # Create header content
-                    header_content = []
-                    header_content.append(Paragraph(name.upper(), name_style_dark))
-                    if job_title:
-                        header_content.append(Paragraph(job_title, title_style_dark))
-
-                    # Contact info
-                    contact_items = []
-                    if city: contact_items.append(city)
-                    if phone: contact_items.append(phone)
-                    if email: contact_items.append(email)
-                    if contact_items:
-                        contact_str = " | ".join(contact_items)
-                        header_content.append(Paragraph(contact_str, contact_style_dark))
-
-                    # Profile Photo
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-
-                            max_size = 1.2 * inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-
-                            img_table = Table([[profile_img]], colWidths=[2*inch])
-                            img_table.setStyle(TableStyle([
-                                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                            ]))
-                            left_elements.append(img_table)
-                            left_elements.append(Spacer(1, 15))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Add other content to columns
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_elements.append(Paragraph("Profile", section_heading_style_dark))
-                        left_elements.append(Paragraph(summary_text, body_style_dark))
-                        left_elements.append(Spacer(1, 15))
-
-                    # Skills
-                    if skills_list:
-                        left_elements.append(Paragraph("Skills", section_heading_style_dark))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_elements.append(Paragraph("• " + skill_line, body_style_dark))
-                        left_elements.append(Spacer(1, 15))
-
-                    # Languages
-                    if languages:
-                        left_elements.append(Paragraph("Languages", section_heading_style_dark))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_elements.append(Paragraph(f"• {lang_name} - {prof}", body_style_dark))
-                            left_elements.append(Spacer(1, 15))
-
-                    # Experience
-                    if experiences:
-                        right_elements.append(Paragraph("Experience", section_heading_style_dark))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_elements.append(Paragraph(f"<b>{pos}</b> - {comp}", body_style_dark))
-                            right_elements.append(Paragraph(f"{sd} - {ed}", info_style_dark))
-                            if desc.strip():
-                                right_elements.append(Paragraph(desc, body_style_dark))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_elements.append(Paragraph("Education", section_heading_style_dark))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_elements.append(Paragraph(f"<b>{deg}</b> - {inst}", body_style_dark))
-                            right_elements.append(Paragraph(f"{sd} - {ed}", info_style_dark))
-                            if dsc.strip():
-                                right_elements.append(Paragraph(dsc, body_style_dark))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_elements.append(Paragraph("Projects", section_heading_style_dark))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_elements.append(Paragraph(f"<b>{proj_name}</b>", body_style_dark))
-                            if link:
-                                right_elements.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", info_style_dark))
-                            if description.strip():
-                                right_elements.append(Paragraph(description, body_style_dark))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_elements.append(Paragraph("Certifications", section_heading_style_dark))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_elements.append(Paragraph(f"<b>{ctitle}</b>", body_style_dark))
-                            right_elements.append(Paragraph(f"Issuer: {issuer}", info_style_dark))
-                            right_elements.append(Paragraph(f"Date: {cdate}", info_style_dark))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Create content table with splitting enabled
-                    content_table = Table([[left_elements, right_elements]], 
-                                        colWidths=[2.3*inch, 5.6*inch],
-                                        splitByRow=True)  # Enable splitting
-                    content_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 0),    # Reduced from 15
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 15),   # Reduced from 15
-                        ('LINEBEFORE', (1, 0), (1, -1), 0.5, vertical_line_color),  # Reduced line width from 1
-                    ]))
-                    elements.append(content_table)
+            result = await render_executor.render(payload)
+        except RenderQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many PDFs are being generated, please try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        except RenderTimeout:
+            raise HTTPException(status_code=504, detail="Generating the PDF took too long")
+        response_headers["X-Render-Builds"] = str(result.builds)
+        for stage, ms in result.timings.items():
+            timing.add(stage, ms, RENDER_STAGES.get(stage, ""))
+        response_headers["Server-Timing"] = timing.header()
 
-                else:
-                    # Default header
-                    header_left = []
-                    header_left.append(Paragraph(name, name_style_default))
-                    header_left.append(Paragraph(job_title, title_style_default))
-
-                    header_right = []
-                    if city:
-                        header_right.append(Paragraph(city, contact_style_default))
-                    if phone:
-                        header_right.append(Paragraph(phone, contact_style_default))
-                    if email:
-                        header_right.append(Paragraph(email, contact_style_default))
-
-                    header_table_data = [[header_left, header_right]]
-                    header_table = Table(header_table_data, colWidths=[2.7*inch, 5.6*inch], splitByRow=True)
-                    header_table.setStyle(TableStyle([
-                        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                        ('LEFTPADDING', (0,0), (-1,-1), 20),
-                        ('RIGHTPADDING', (0,0), (-1,-1), 20),
-                        ('TOPPADDING', (0,0), (-1,-1), 0),
-                    ]))
-                    elements.append(header_table)
-
-                    # Horizontal line under the header
-                    line_data = [['']]
-                    line_table = Table(line_data, colWidths=[8*inch])
-                    line_table.setStyle(TableStyle([
-                        ('LINEBELOW', (0, 0), (-1, 0), 1, line_color),
-                    ]))
-                    elements.append(Spacer(1, 5))
-                    elements.append(line_table)
-                    elements.append(Spacer(1, 12))
-
-                    # Two-column layout
-                    left_elements = []
-                    right_elements = []
-
-                    # Profile Photo
-                    if photo_data:
-                        try:
-                            if photo_data.startswith('data:image'):
-                                _, encoded = photo_data.split(',', 1)
-                                img_data = base64.b64decode(encoded)
-                                pil_image = Image.open(io.BytesIO(img_data)).convert('RGBA')
-                            else:
-                                pil_image = Image.open(photo_data).convert('RGBA')
-
-                            pil_image = round_corners(pil_image, radius=40)
-
-                            max_size = 1.2 * inch  # Reduced from 1.5 inch
-                            w, h = pil_image.size
-                            aspect_ratio = w / float(h)
-                            if aspect_ratio > 1:
-                                new_w = max_size
-                                new_h = max_size / aspect_ratio
-                            else:
-                                new_h = max_size
-                                new_w = max_size * aspect_ratio
-
-                            buf = io.BytesIO()
-                            pil_image.save(buf, format='PNG')
-                            buf.seek(0)
-                            profile_img = RLImage(buf, width=new_w, height=new_h)
-
-                            img_table = Table([[profile_img]], colWidths=[2*inch])
-                            img_table.setStyle(TableStyle([
-                                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                            ]))
-                            left_elements.append(img_table)
-                            left_elements.append(Spacer(1, 15))
-                        except Exception as e:
-                            print("Error loading photo:", e)
-
-                    # Summary / Profile
-                    if summary_text.strip():
-                        left_elements.append(Paragraph("Profile", section_heading_style_default))
-                        left_elements.append(Paragraph(summary_text, body_style_default))
-                        left_elements.append(Spacer(1, 15))
-
-                    # Skills
-                    if skills_list:
-                        left_elements.append(Paragraph("Skills", section_heading_style_default))
-                        for s in skills_list:
-                            skill_line = s.get('skill', '')
-                            proficiency = s.get('proficiency', '')
-                            if proficiency:
-                                skill_line += f" ({proficiency})"
-                            left_elements.append(Paragraph("• " + skill_line, body_style_default))
-                        left_elements.append(Spacer(1, 15))
-
-                    # Languages
-                    if languages:
-                        left_elements.append(Paragraph("Languages", section_heading_style_default))
-                        for lang in languages:
-                            lang_name = lang.get('language', '')
-                            prof = lang.get('proficiency', '')
-                            left_elements.append(Paragraph(f"• {lang_name} - {prof}", body_style_default))
-                            left_elements.append(Spacer(1, 15))
-
-                    # Experience
-                    if experiences:
-                        right_elements.append(Paragraph("Experience", section_heading_style_default))
-                        for exp in experiences:
-                            pos = exp.get('position', '')
-                            comp = exp.get('company', '')
-                            sd = exp.get('start_date', '')
-                            is_current = exp.get('is_current', False)
-                            ed = 'Present' if is_current else exp.get('end_date', '')
-                            desc = exp.get('description', '')
-
-                            right_elements.append(Paragraph(f"<b>{pos}</b> - {comp}", body_style_default))
-                            right_elements.append(Paragraph(f"{sd} - {ed}", info_style_default))
-                            if desc.strip():
-                                right_elements.append(Paragraph(desc, body_style_default))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Education
-                    if educations:
-                        right_elements.append(Paragraph("Education", section_heading_style_default))
-                        for edu in educations:
-                            deg = edu.get('degree', '')
-                            inst = edu.get('institution', '')
-                            sd = edu.get('start_date', '')
-                            is_cur = edu.get('is_current', False)
-                            ed = 'Present' if is_cur else edu.get('end_date', '')
-                            dsc = edu.get('description', '')
-
-                            right_elements.append(Paragraph(f"<b>{deg}</b> - {inst}", body_style_default))
-                            right_elements.append(Paragraph(f"{sd} - {ed}", info_style_default))
-                            if dsc.strip():
-                                right_elements.append(Paragraph(dsc, body_style_default))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Projects
-                    if projects:
-                        right_elements.append(Paragraph("Projects", section_heading_style_default))
-                        for proj in projects:
-                            proj_name = proj.get('name', '')
-                            description = proj.get('description', '')
-                            link = proj.get('link', '')
-
-                            right_elements.append(Paragraph(f"<b>{proj_name}</b>", body_style_default))
-                            if link:
-                                right_elements.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", info_style_default))
-                            if description.strip():
-                                right_elements.append(Paragraph(description, body_style_default))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Certifications
-                    if certifications:
-                        right_elements.append(Paragraph("Certifications", section_heading_style_default))
-                        for cert in certifications:
-                            ctitle = cert.get('title', '')
-                            issuer = cert.get('issuer', '')
-                            cdate = cert.get('date', '')
-
-                            right_elements.append(Paragraph(f"<b>{ctitle}</b>", body_style_default))
-                            right_elements.append(Paragraph(f"Issuer: {issuer}", info_style_default))
-                            right_elements.append(Paragraph(f"Date: {cdate}", info_style_default))
-                            right_elements.append(Spacer(1, 10))
-
-                    # Create content table with splitting enabled
-                    content_table = Table([[left_elements, right_elements]], 
-                                        colWidths=[2.3*inch, 5.6*inch],
-                                        splitByRow=True)  # Enable splitting
-                    content_table.setStyle(TableStyle([
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 0),    # Reduced from 15
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 15),   # Reduced from 15
-                        ('LINEBEFORE', (1, 0), (1, -1), 0.5, vertical_line_color),  # Reduced line width from 1
-                    ]))
-                    elements.append(content_table)
-
-                # Build the document
-                doc.build(elements)
-                return True
-            except Exception as e:
-                if "too large on page" in str(e) and height_multiplier < 3.0:  # Maximum 3 times A4 height
-                    print(f"Trying with height multiplier: {height_multiplier + 0.1}")
-                    return try_build_pdf(height_multiplier + 0.1)
-                else:
-                    raise e
+        if result.path is not None:
+            # Spooled to disk by the worker: stream the file, which is deleted
+            # once the response has been sent
+            return pdf_response(iter_file(result.path), result.size, response_headers)
 
-        # Try to build PDF with incrementally increasing height
-        try_build_pdf()
+        render_cache.put(render_key, resume_id, result.data, cache_epoch)
 
         # Return the generated PDF
-        return FileResponse(
-            path=filename,
-            media_type='application/pdf',
-            filename=f"{name.replace(' ', '_')}_{selected_theme or 'default'}_{datetime.now().strftime('%Y%m%d')}.pdf",
-            background=background_tasks
-        )
+        return pdf_response(iter_bytes(result.data), result.size, response_headers)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error building PDF document: {e}")
-        if os.path.exists(filename):
-            os.remove(filename)
         raise HTTPException(
             status_code=500,
             detail=f"Error generating PDF: {str(e)}"
         )
-    finally:
-        # Add cleanup task to remove the temporary file after download
-        def cleanup():
+
+@app.get("/resumes/{resume_id}/preview", response_class=HTMLResponse)
+async def preview_resume(
+    resume_id: int,
+    theme: str = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    The resume as an HTML page in the theme's colours and layout, for live
+    previews. It is built straight from the theme palette instead of through
+    ReportLab, so it takes milliseconds rather than a full PDF render.
+    """
+    resume = await find_resume(db, resume_id, current_user.id, undefer_group("content"))
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    # Unknown themes render as the default one; never put the raw query value in a header
+    theme = get_theme_info(theme).name
+    headers = {
+        "ETag": make_etag(f"preview-{PREVIEW_VERSION}-{resume.render_token}-v{resume.version}-{theme}"),
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(render_resume_html(render_payload(resume, theme)), headers=headers)
+
+def schedule_prerender(user_id: int, resume_id: int):
+    """Queue a background render of a saved resume, per PRERENDER_MODE"""
+    if PRERENDER_MODE == "off":
+        return
+    prerender_debouncer.schedule(resume_id, lambda: prerender_resume(user_id, resume_id))
+
+async def prerender_resume(user_id: int, resume_id: int):
+    """
+    Render the current version of a resume into the render cache so the next
+    download is served from it. This only uses idle render workers: when the
+    pool is busy with downloads the prerender is dropped.
+    """
+    if PRERENDER_MODE == "all":
+        theme_names = list(THEMES)
+    else:
+        last_theme = last_themes.get(user_id, resume_id)
+        if last_theme is None:
+            # Never downloaded: nothing tells us which theme to prepare
+            return
+        theme_names = [last_theme]
+
+    cache_epoch = render_cache.epoch()
+    async with AsyncSessionLocal() as db:
+        resume = await find_resume(db, resume_id, user_id, undefer_group("content"))
+    if resume is None:
+        return
+    photo = get_blob(resume.photo_hash) if resume.photo_hash else None
+    for theme in theme_names:
+        render_key = compute_render_key(resume, theme)
+        if render_cache.contains(render_key):
+            continue
+        if render_executor.busy():
+            return
+        try:
+            result = await render_executor.render(render_payload(resume, theme, photo))
+        except (RenderQueueFull, RenderTimeout):
+            return
+        if result.path is not None:
+            # Too large for the render cache; it will be rendered on download
+            os.remove(result.path)
+            continue
+        render_cache.put(render_key, resume_id, result.data, cache_epoch)
+
+# Largest export request, and how many export PDFs are rendered at once
+# across all exports. Exports never take more than this share of the render
+# pool, so interactive downloads still find workers and queue room.
+EXPORT_MAX_ENTRIES = int(os.environ.get("EXPORT_MAX_ENTRIES", 50))
+EXPORT_CONCURRENCY = int(os.environ.get("EXPORT_CONCURRENCY", max(1, render_executor.workers // 2)))
+export_render_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+# How long an export entry waits for room in a full render queue
+EXPORT_QUEUE_WAIT_SECONDS = 30
+
+@app.post("/resumes/export")
+async def export_resumes(
+    export: schemas.ExportRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Render several (resume, theme) pairs and stream them back as one ZIP.
+    Entries are rendered in parallel and written to the archive as they
+    finish, so at most EXPORT_CONCURRENCY PDFs are held in memory.
+    """
+    # Unknown themes render as the default one, so they are the same entry
+    pairs = list(dict.fromkeys((entry.resume_id, get_theme_info(entry.theme).name) for entry in export.entries))
+    if len(pairs) > EXPORT_MAX_ENTRIES:
+        raise HTTPException(status_code=400, detail=f"At most {EXPORT_MAX_ENTRIES} entries can be exported at once")
+    resume_ids = {resume_id for resume_id, _ in pairs}
+    cache_epoch = render_cache.epoch()
+    result = await db.scalars(
+        select(models.Resume).options(undefer_group("content")).where(
+            models.Resume.id.in_(resume_ids), models.Resume.user_id == current_user.id
+        )
+    )
+    resumes = {resume.id: resume for resume in result}
+    missing = sorted(resume_ids - resumes.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Resumes not found: {', '.join(map(str, missing))}")
+
+    # Each resume's photo is read once and shared by all of its themes
+    photos = {
+        resume.id: get_blob(resume.photo_hash) if resume.photo_hash else None
+        for resume in resumes.values()
+    }
+    jobs = []
+    for resume_id, theme in pairs:
+        resume = resumes[resume_id]
+        name = (resume.full_name or "resume").replace(' ', '_').replace('/', '_')
+        jobs.append((
+            f"{resume_id}_{name}_{theme}.pdf",
+            compute_render_key(resume, theme),
+            render_payload(resume, theme, photos[resume_id]),
+        ))
+
+    download_name = f"resumes_{datetime.now().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        export_chunks(jobs, cache_epoch),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
+    )
+
+async def render_export_entry(render_key: str, payload: RenderPayload, cache_epoch: int):
+    """Render one export entry, from the render cache when possible"""
+    cached_pdf = render_cache.get(render_key)
+    if cached_pdf is not None:
+        return cached_pdf, None
+    waited = 0.0
+    async with export_render_slots:
+        while True:
             try:
-                if os.path.exists(filename):
-                    os.remove(filename)
-                    print(f"Temporary file {filename} removed successfully")
-            except Exception as e:
-                print(f"Error removing temporary file: {e}")
-        
-        background_tasks.add_task(cleanup)
-
-def create_section(title, items, style_heading, style_body, style_info):
-    elements = []
-    elements.append(Paragraph(title, style_heading))
-    for item in items:
-        for p in item:
-            elements.append(p)
-        elements.append(Spacer(1, 8))
-    return elements
+                result = await render_executor.render(payload)
+                break
+            except RenderQueueFull:
+                # Downloads filled the queue; wait for room instead of failing the entry
+                if waited >= EXPORT_QUEUE_WAIT_SECONDS:
+                    raise
+                await asyncio.sleep(0.5)
+                waited += 0.5
+    if result.path is not None:
+        return None, result.path
+    render_cache.put(render_key, payload.resume_id, result.data, cache_epoch)
+    return result.data, None
+
+async def export_chunks(jobs, cache_epoch: int):
+    zip_stream = ZipStream()
+    failures = []
+    queue = iter(jobs)
+    running = {}
+
+    def start_next():
+        job = next(queue, None)
+        if job is not None:
+            name, render_key, payload = job
+            running[asyncio.ensure_future(render_export_entry(render_key, payload, cache_epoch))] = name
+
+    for _ in range(max(EXPORT_CONCURRENCY, 1)):
+        start_next()
+    try:
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                start_next()
+                try:
+                    data, path = task.result()
+                except RenderQueueFull:
+                    failures.append(f"{name}: the render queue stayed full")
+                    continue
+                except RenderTimeout:
+                    failures.append(f"{name}: rendering took too long")
+                    continue
+                except Exception as e:
+                    print(f"Error exporting {name}: {e}")
+                    failures.append(f"{name}: {e}")
+                    continue
+                # The PDFs are written without page compression, so deflating
+                # them is real CPU work; it runs in a thread, off the event loop
+                if path is not None:
+                    try:
+                        chunks = zip_stream.add_file(name, path)
+                        while True:
+                            chunk = await asyncio.to_thread(next, chunks, None)
+                            if chunk is None:
+                                break
+                            yield chunk
+                    finally:
+                        os.remove(path)
+                else:
+                    yield await asyncio.to_thread(zip_stream.add, name, data)
+        if failures:
+            # The response has already started, so failures are reported inside the archive
+            yield zip_stream.add("errors.txt", "\n".join(failures).encode("utf-8"))
+        yield zip_stream.close()
+    finally:
+        # Only left over when the client went away: stop waiting for those renders
+        for task in running:
+            task.cancel()
+
+# ----- Render Jobs -----
+@app.post("/resumes/{resume_id}/render-jobs", status_code=202, response_model=schemas.RenderJob)
+async def create_render_job(
+    resume_id: int,
+    response: Response,
+    theme: str = Query(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a render and return immediately; poll the job for its status and
+    download the PDF from its result_url once it is done.
+    """
+    owned = await db.scalar(select(models.Resume.id).where(
+        models.Resume.id == resume_id, models.Resume.user_id == current_user.id
+    ))
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    job = models.RenderJob(
+        id=new_job_id(),
+        user_id=current_user.id,
+        resume_id=resume_id,
+        theme=theme or "",
+        status="queued",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    render_job_worker.notify()
+    response.headers["Location"] = f"/render-jobs/{job.id}"
+    return render_job_response(job)
+
+@app.get("/render-jobs/{job_id}", response_model=schemas.RenderJob)
+async def get_render_job(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return render_job_response(await find_render_job(db, job_id, current_user.id))
+
+@app.get("/render-jobs/{job_id}/result")
+async def get_render_job_result(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await find_render_job(db, job_id, current_user.id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Render job is {job.status}")
+    path = blob_path(job.result_hash)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Render result has expired")
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"resume_{job.resume_id}_{job.theme or 'default'}.pdf",
+        headers={"ETag": make_etag(job.result_hash), "Cache-Control": "private, max-age=3600"},
+    )
+
+async def find_render_job(db: AsyncSession, job_id: str, user_id: int) -> models.RenderJob:
+    job = await db.get(models.RenderJob, job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Render job not found")
+    return job
+
+def render_job_response(job: models.RenderJob) -> schemas.RenderJob:
+    result = schemas.RenderJob.from_orm(job)
+    if job.status == "done":
+        result.result_url = f"/render-jobs/{job.id}/result"
+    return result
+
+def attachment_disposition(filename: str) -> str:
+    """
+    Content-Disposition for a download, as FileResponse builds it: names that
+    are not plain ASCII, or contain quotes, are sent percent-encoded in
+    filename* (RFC 5987) so the header stays valid.
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+def pdf_response(chunks, size: int, headers: dict) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type='application/pdf',
+        headers={**headers, "Content-Length": str(size)},
+    )
+
+# ----- Diagnostics -----
+# Server-Timing descriptions of the stages a render worker reports
+RENDER_STAGES = {
+    "queue": "Waiting for a render worker",
+    "photo": "Photo processing",
+    "story": "Flowable construction",
+    "measure": "Height measurement",
+    "build": "Document build",
+    "retry": "Height retries",
+    "output": "Reading the PDF back",
+}
+
+def cache_metrics():
+    """Scrape-time collector for the counters the caches keep themselves"""
+    caches = {"auth": auth_cache.stats(), "render": render_cache.stats()}
+    yield ("cv_cache_requests_total", "counter", "Cache lookups by cache and result", [
+        ({"cache": name, "result": result}, stats[key])
+        for name, stats in caches.items() for result, key in (("hit", "hits"), ("miss", "misses"))
+    ])
+    yield ("cv_cache_entries", "gauge", "Entries currently held by each cache", [
+        ({"cache": name}, stats["entries"]) for name, stats in caches.items()
+    ])
+    yield ("cv_render_cache_bytes", "gauge", "Bytes of PDFs held by the render cache", [
+        ({}, caches["render"]["bytes"])
+    ])
+
+metrics_registry.add_collector(cache_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Request latency, render and cache metrics of this process in the Prometheus text format"""
+    return PlainTextResponse(metrics_registry.expose(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/caches")
+def cache_stats():
+    """Hit/miss counters of the in-process caches"""
+    return {
+        "auth": auth_cache.stats(),
+        "render": render_cache.stats(),
+    }
+
+@app.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("pstats", regex="^(pstats|text)$"),
+    sort: str = Query("cumulative", regex="^(cumulative|tottime|ncalls)$"),
+    x_profile: Optional[str] = Header(None),
+    profile: Optional[str] = Query(None),
+):
+    """
+    A stored request profile, for operators holding PROFILE_TOKEN: the raw
+    pstats file (for pstats, snakeviz and friends) or a text summary.
+    """
+    path = profile_path(profile_id) if profiling_allowed(x_profile or profile) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        return PlainTextResponse(profile_text(path, sort))
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
 
 @app.get("/")
 async def serve_spa():
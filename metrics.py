@@ -0,0 +1,228 @@
+# metrics.py
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, key)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label combination."""
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float], labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.labels = tuple(labels)
+        # Per label combination: bucket counts, sum, count
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = f'le="{format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    The metrics of this process in the Prometheus text format. Collectors are
+    called at scrape time for values other modules already count themselves
+    (cache statistics); each returns (name, type, help, [(labels, value)]).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple]]) -> None:
+        self._collectors.append(collector)
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.expose()
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    names, values = tuple(labels), tuple(labels.values())
+                    lines.append(f"{name}{format_labels(names, values)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_seconds = registry.register(Histogram(
+    "cv_http_request_duration_seconds", "Time to handle a request, by route template",
+    LATENCY_BUCKETS, labels=("method", "route", "status"),
+))
+renders_total = registry.register(Counter(
+    "cv_pdf_renders_total", "PDF renders by theme and outcome (ok, error, timeout, rejected)",
+    labels=("theme", "outcome"),
+))
+render_seconds = registry.register(Histogram(
+    "cv_pdf_render_duration_seconds", "Time from submitting a render to receiving the PDF",
+    LATENCY_BUCKETS, labels=("theme",),
+))
+render_stage_seconds = registry.register(Histogram(
+    "cv_pdf_render_stage_duration_seconds", "Time spent in each stage of a render",
+    LATENCY_BUCKETS, labels=("stage",),
+))
+render_retries_total = registry.register(Counter(
+    "cv_pdf_render_retries_total", "Extra document builds needed to fit the page height",
+    labels=("theme",),
+))
+render_bytes = registry.register(Histogram(
+    "cv_pdf_render_bytes", "Size of rendered PDFs", BYTES_BUCKETS, labels=("theme",),
+))
+
+
+def record_render(theme: str, outcome: str, seconds: Optional[float] = None, result=None) -> None:
+    """Count one render; result is the RenderResult of a successful one."""
+    renders_total.inc(theme=theme, outcome=outcome)
+    if result is None:
+        return
+    render_seconds.observe(seconds, theme=theme)
+    render_bytes.observe(result.size, theme=theme)
+    if result.builds > 1:
+        render_retries_total.inc(result.builds - 1, theme=theme)
+    for stage, ms in result.timings.items():
+        render_stage_seconds.observe(ms / 1000, stage=stage)
+
+
+class ServerTiming:
+    """Collects stage durations for a response's Server-Timing header."""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, float, str]] = []
+
+    def add(self, name: str, ms: float, description: str = "") -> None:
+        self._entries.append((name, ms, description))
+
+    def stage(self, name: str, description: str = "") -> "_Stage":
+        return _Stage(self, name, description)
+
+    def header(self) -> str:
+        return ", ".join(
+            f'{name};dur={ms:.1f}' + (f';desc="{description}"' if description else "")
+            for name, ms, description in self._entries
+        )
+
+
+class _Stage:
+    def __init__(self, timing: ServerTiming, name: str, description: str):
+        self.timing = timing
+        self.name = name
+        self.description = description
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timing.add(self.name, (time.perf_counter() - self.start) * 1000, self.description)
+
+
+class RequestTimingMiddleware:
+    """
+    Records every HTTP request in cv_http_request_duration_seconds, labelled
+    with the route template (/resumes/{resume_id}) rather than the raw path,
+    so there is one series per endpoint. Streaming responses are timed until
+    their last chunk has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                # Preflights answered by the CORS middleware never reach a route
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
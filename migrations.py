@@ -0,0 +1,45 @@
+# migrations.py
+# Brings the database schema up to date by running the Alembic history in
+# alembic/versions. This runs on startup; the same history can be run by
+# hand with "alembic upgrade head".
+#
+# Databases created before the history existed (by Base.metadata.create_all
+# and the old ad-hoc upgrade steps) have no alembic_version table. The first
+# revisions therefore check what already exists before changing anything, so
+# such a database is brought to head from wherever it stands.
+import os
+
+from sqlalchemy import inspect
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def upgrade(engine, revision: str = "head") -> None:
+    # Alembic is only needed when migrating, so the app does not import it
+    # until startup runs this
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+# Helpers for the revisions written for databases of unknown state
+
+def has_table(conn, table) -> bool:
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table, column) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_index(conn, table, index) -> bool:
+    return index in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+if __name__ == "__main__":
+    from database import engine
+    upgrade(engine)
@@ -1,34 +1,50 @@
 # models.py
-from sqlalchemy import Column, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from datetime import datetime
+import uuid
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import deferred, relationship
 from database import Base
 
+# Format of the JSON stored in the section columns; rows are brought up to
+# date by the Alembic history in alembic/versions
+SECTIONS_VERSION = 1
+# Characters of the photo hash put in photo URLs as their version
+PHOTO_VERSION_CHARS = 16
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    resumes = relationship("Resume", back_populates="user")
+    # Never loaded implicitly: loading it per user would be a hidden N+1;
+    # query resumes explicitly or use selectinload
+    resumes = relationship("Resume", back_populates="user", lazy="raise_on_sql")
 
 class Resume(Base):
     __tablename__ = "resumes"
+    # Every lookup is by owner and id, and lists page through an owner's resumes in id order
+    # AUTOINCREMENT keeps SQLite from handing a deleted resume's id to the next one
+    __table_args__ = (Index("ix_resumes_user_id_id", "user_id", "id"), {"sqlite_autoincrement": True})
     
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
     full_name = Column(String)
     email = Column(String)
     phone = Column(String)
     city = Column(String)
     language = Column(String)
-    summary = Column(Text)
-    experience = Column(Text)   # Will store JSON string of experience items
-    education = Column(Text)    # Will store JSON string of education items
-    skills = Column(Text)       # Will store JSON string of skills items
-    projects = Column(Text)     # Will store JSON string of project items
-    certifications = Column(Text)  # Will store JSON string of certification items
-    languages = Column(Text)     # Will store JSON string of language items
-    photo = Column(String, nullable=True)
+    # The long text columns are only loaded when accessed (all together, as
+    # the "content" group), so listing resumes never reads them
+    summary = deferred(Column(Text), group="content")
+    experience = deferred(Column(JSON), group="content")   # List of validated experience items
+    education = deferred(Column(JSON), group="content")    # List of validated education items
+    skills = deferred(Column(JSON), group="content")       # List of validated skill items
+    projects = deferred(Column(JSON), group="content")     # List of validated project items
+    certifications = deferred(Column(JSON), group="content")  # List of validated certification items
+    languages = deferred(Column(JSON), group="content")     # List of validated language items
+    sections_version = Column(Integer, default=SECTIONS_VERSION, onupdate=SECTIONS_VERSION)
+    photo_hash = Column(String(64), nullable=True, index=True)  # Blob store digest of the profile photo
     # Section Titles
     experience_title = Column(String, default="EXPERIENCE")
     education_title = Column(String, default="EDUCATION")
@@ -38,4 +54,44 @@ class Resume(Base):
     languages_title = Column(String, default="LANGUAGES")
     summary_title = Column(String, default="PROFILE")
     user_id = Column(Integer, ForeignKey("users.id"))
-    user = relationship("User", back_populates="resumes")
+    user = relationship("User", back_populates="resumes", lazy="raise_on_sql")
+    # Bumped by SQLAlchemy on every UPDATE, which also checks it is unchanged
+    version = Column(Integer, nullable=False)
+    # Random value that no other resume ever gets, unlike an id and version
+    # pair; the render cache keys and PDF ETags include it
+    render_token = Column(String(32), nullable=False, default=lambda: uuid.uuid4().hex)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def photo(self):
+        """URL of the profile photo; the versioned query string makes it safe to cache"""
+        if self.photo_hash is None:
+            return None
+        return f"/resumes/{self.id}/photo?v={self.photo_hash[:PHOTO_VERSION_CHARS]}"
+
+class RenderJob(Base):
+    """A PDF render requested through the job API, processed by render_jobs.RenderJobWorker"""
+    __tablename__ = "render_jobs"
+    # The worker claims due jobs by status, oldest next_attempt_at first
+    __table_args__ = (
+        Index("ix_render_jobs_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_render_jobs_status_started_at", "status", "started_at"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    resume_id = Column(Integer, index=True)
+    theme = Column(String, default="")
+    status = Column(String(16), default="queued")  # queued, running, done or failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    resume_version = Column(Integer, nullable=True)  # Version that was rendered
+    result_hash = Column(String(64), nullable=True, index=True)  # Blob store digest of the PDF
+    result_size = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
@@ -0,0 +1,74 @@
+# password_hasher.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from pending_limit import PendingLimit
+
+# bcrypt cost factor for new hashes. Stored hashes with a different cost are
+# rehashed the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+HASH_POOL_SIZE = int(os.environ.get("HASH_POOL_SIZE", min(4, os.cpu_count() or 1)))
+# Maximum number of hashes running or waiting for a thread; more are rejected
+HASH_QUEUE_SIZE = int(os.environ.get("HASH_QUEUE_SIZE", HASH_POOL_SIZE * 8))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingQueueFull(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in its own small thread pool, so a burst of logins waits
+    for these threads instead of filling the threadpool every sync endpoint
+    shares. The number of queued and running hashes is bounded.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending = PendingLimit(max_pending, HashingQueueFull)
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        self._pending.acquire()
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        self._pending.release_when_done(future)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Check a password; the second value is a new hash when the stored one is outdated."""
+        return await self.run(pwd_context.verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._pool
+
+
+password_hasher = PasswordHasher(HASH_POOL_SIZE, HASH_QUEUE_SIZE)
@@ -0,0 +1,496 @@
+# pdf_renderer.py
+import cProfile
+import time
+from contextlib import contextmanager
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch, mm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Flowable
+from reportlab.platypus import Frame, PageTemplate
+from reportlab.platypus.doctemplate import LayoutError
+
+from photo_cache import get_processed_photo
+from pdf_spool import PDF_SPOOL_MAX_MEMORY, new_spool, spool_to_file
+from profiling import profile_bytes
+from render_executor import RenderPayload, RenderResult
+from themes import get_theme, load_themes
+
+def draw_vertical_line(canvas, doc, line_color=colors.HexColor('#AAAAAA')):
+    """Draw a vertical line for the two-column layout"""
+    height = doc.pagesize[1]  # Get page height
+    x = 2.7 * inch  # Position for vertical line (adjust based on your column width)
+    
+    # Draw line from top to bottom of page
+    canvas.setStrokeColor(line_color)
+    canvas.setLineWidth(0.5)
+    canvas.line(x, 30, x, height - 30)
+
+class NumberedCanvas(canvas.Canvas):
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        """Add page info to each page (page x of y)"""
+        num_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            self.draw_page_number(num_pages)
+            canvas.Canvas.showPage(self)
+        canvas.Canvas.save(self)
+
+    def draw_page_number(self, page_count):
+        # Only draw page numbers if there are multiple pages
+        if page_count > 1:
+            self.setFont("Helvetica", 8)
+            self.drawRightString(
+                A4[0] - 20,
+                20,
+                f"Page {self._pageNumber} of {page_count}"
+            )
+
+# Maximum 3 times A4 height
+MAX_PAGE_HEIGHT = A4[1] * 3.0
+
+def measure_story_height(elements, width):
+    """Height a single padding-free frame of the given width needs to hold all the flowables"""
+    total = 0
+    for index, flowable in enumerate(elements):
+        _, height = flowable.wrap(width, MAX_PAGE_HEIGHT)
+        if index:
+            total += flowable.getSpaceBefore()
+        total += height + flowable.getSpaceAfter()
+    return total
+
+@contextmanager
+def timed_stage(timings, name):
+    """Add the time spent in the block to timings[name], in milliseconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+def build_single_page_pdf(build_story, make_doc, content_width, output, timings=None):
+    """
+    Build the story on a single page that is exactly as tall as the content.
+    The height comes from the flowables' own wrap pass, so the document is
+    normally built once. Returns the number of builds that were needed.
+    Stage times (story, measure, build, retry) are added to timings if given.
+    """
+    with timed_stage(timings, "story"):
+        elements = build_story()
+    with timed_stage(timings, "measure"):
+        content_height = measure_story_height(elements, content_width)
+    page_height = min(max(A4[1], content_height + 1), MAX_PAGE_HEIGHT)
+    builds = 0
+    while True:
+        builds += 1
+        output.seek(0)
+        output.truncate()
+        try:
+            # Builds after the first are only needed when the measurement fell short
+            with timed_stage(timings, "build" if builds == 1 else "retry"):
+                make_doc(page_height).build(elements)
+            return builds
+        except LayoutError:
+            if page_height >= MAX_PAGE_HEIGHT:
+                raise
+            # The measurement fell short; grow the page and try again
+            page_height = min(page_height + 0.1 * A4[1], MAX_PAGE_HEIGHT)
+            with timed_stage(timings, "retry"):
+                elements = build_story()
+
+class ResumeContent:
+    """The resume fields a layout needs, prepared once per render"""
+
+    def __init__(self, payload: RenderPayload):
+        self.name = payload.full_name or ""
+        self.job_title = payload.title or ""
+        self.city = payload.city or ""
+        self.phone = payload.phone or ""
+        self.email = payload.email or ""
+        self.contact_items = [item for item in (self.city, self.phone, self.email) if item]
+        self.summary = payload.summary or ""
+        self.photo = payload.photo
+        self.experiences = payload.experience or []
+        self.educations = payload.education or []
+        self.skills = payload.skills or []
+        self.projects = payload.projects or []
+        self.certifications = payload.certifications or []
+        self.languages = payload.languages or []
+
+class ProfilePhoto(Flowable):
+    """Draws a cached, processed photo without decoding it again"""
+
+    def __init__(self, photo):
+        Flowable.__init__(self)
+        self.photo = photo
+        self.drawWidth = photo.width
+        self.drawHeight = photo.height
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.canv.drawImage(self.photo.reader(), 0, 0, self.drawWidth, self.drawHeight, mask='auto')
+
+def profile_image(photo_data):
+    """The profile photo with rounded corners, scaled to fit a 1.2 inch box"""
+    try:
+        return ProfilePhoto(get_processed_photo(photo_data, max_size=1.2 * inch, radius=40))
+    except Exception as e:
+        print("Error loading photo:", e)
+        return None
+
+def side_sections(content, heading_style, body_style, gap, titles=("Profile", "Skills", "Languages")):
+    """Profile, skills and languages for the narrow column"""
+    column = []
+    profile_title, skills_title, languages_title = titles
+
+    # Summary / Profile
+    if content.summary.strip():
+        column.append(Paragraph(profile_title, heading_style))
+        column.append(Paragraph(content.summary, body_style))
+        column.append(Spacer(1, gap))
+
+    # Skills
+    if content.skills:
+        column.append(Paragraph(skills_title, heading_style))
+        for s in content.skills:
+            skill_line = s.get('skill', '')
+            proficiency = s.get('proficiency', '')
+            if proficiency:
+                skill_line += f" ({proficiency})"
+            column.append(Paragraph("• " + skill_line, body_style))
+        column.append(Spacer(1, gap))
+
+    # Languages
+    if content.languages:
+        column.append(Paragraph(languages_title, heading_style))
+        for lang in content.languages:
+            lang_name = lang.get('language', '')
+            prof = lang.get('proficiency', '')
+            column.append(Paragraph(f"• {lang_name} - {prof}", body_style))
+        column.append(Spacer(1, gap))
+
+    return column
+
+def main_sections(content, heading_style, body_style, info_style, detail_style, inline_company):
+    """
+    Experience, education, projects and certifications for the wide column.
+    inline_company puts the company/institution on the position/degree line.
+    """
+    column = []
+
+    # Experience
+    if content.experiences:
+        column.append(Paragraph("Experience", heading_style))
+        for exp in content.experiences:
+            pos = exp.get('position', '')
+            comp = exp.get('company', '')
+            sd = exp.get('start_date', '')
+            is_current = exp.get('is_current', False)
+            ed = 'Present' if is_current else exp.get('end_date', '')
+            desc = exp.get('description', '')
+
+            if inline_company:
+                column.append(Paragraph(f"<b>{pos}</b> - {comp}", body_style))
+            else:
+                column.append(Paragraph(f"<b>{pos}</b>", body_style))
+                column.append(Paragraph(comp, info_style))
+            column.append(Paragraph(f"{sd} - {ed}", info_style))
+            if desc.strip():
+                column.append(Paragraph(desc, body_style))
+            column.append(Spacer(1, 10))
+
+    # Education
+    if content.educations:
+        column.append(Paragraph("Education", heading_style))
+        for edu in content.educations:
+            deg = edu.get('degree', '')
+            inst = edu.get('institution', '')
+            sd = edu.get('start_date', '')
+            is_cur = edu.get('is_current', False)
+            ed = 'Present' if is_cur else edu.get('end_date', '')
+            dsc = edu.get('description', '')
+
+            if inline_company:
+                column.append(Paragraph(f"<b>{deg}</b> - {inst}", body_style))
+            else:
+                column.append(Paragraph(f"<b>{deg}</b>", body_style))
+                column.append(Paragraph(inst, info_style))
+            column.append(Paragraph(f"{sd} - {ed}", info_style))
+            if dsc.strip():
+                column.append(Paragraph(dsc, body_style))
+            column.append(Spacer(1, 10))
+
+    # Projects
+    if content.projects:
+        column.append(Paragraph("Projects", heading_style))
+        for proj in content.projects:
+            proj_name = proj.get('name', '')
+            description = proj.get('description', '')
+            link = proj.get('link', '')
+
+            column.append(Paragraph(f"<b>{proj_name}</b>", body_style))
+            if link:
+                column.append(Paragraph(f"Link: <a href='{link}'>{link}</a>", detail_style))
+            if description.strip():
+                column.append(Paragraph(description, body_style))
+            column.append(Spacer(1, 10))
+
+    # Certifications
+    if content.certifications:
+        column.append(Paragraph("Certifications", heading_style))
+        for cert in content.certifications:
+            ctitle = cert.get('title', '')
+            issuer = cert.get('issuer', '')
+            cdate = cert.get('date', '')
+
+            column.append(Paragraph(f"<b>{ctitle}</b>", body_style))
+            column.append(Paragraph(f"Issuer: {issuer}", detail_style))
+            column.append(Paragraph(f"Date: {cdate}", detail_style))
+            column.append(Spacer(1, 10))
+
+    return column
+
+def build_banner_story(theme, content, width):
+    """Coloured header banner over a 35/65 two-column body"""
+    styles = theme.styles
+
+    # Create header content
+    header_content = []
+    if content.name:
+        header_content.append(Paragraph(content.name, styles['name']))
+    if content.job_title:
+        header_content.append(Paragraph(content.job_title, styles['title']))
+    if content.contact_items:
+        header_content.append(Paragraph(" | ".join(content.contact_items), styles['contact']))
+
+    # Create left and right columns
+    left_column = []
+    if content.photo:
+        profile_img = profile_image(content.photo)
+        if profile_img is not None:
+            left_column.append(profile_img)
+            left_column.append(Spacer(1, 15))
+    left_column += side_sections(content, styles['section_heading'], styles['body'], gap=15)
+    right_column = main_sections(
+        content, styles['section_heading'], styles['body'], styles['info'], styles['info'],
+        inline_company=False,
+    )
+
+    # Create a single table for both header and content
+    main_table_data = [
+        [Table([[cell] for cell in header_content],
+               colWidths=[width],
+               style=theme.table_styles['header'])],
+        [Table([[left_column, right_column]],
+               colWidths=[width * 0.35, width * 0.65],
+               style=theme.table_styles['columns'])],
+    ]
+    main_table = Table(main_table_data, colWidths=[width])
+    main_table.setStyle(theme.table_styles['main'])
+    return [main_table]
+
+def build_sidebar_story(theme, content, width):
+    """Full-height coloured sidebar next to the main column"""
+    styles = theme.styles
+
+    # Create left column flowables
+    left_col_flowables = []
+    if content.photo:
+        profile_img = profile_image(content.photo)
+        if profile_img is not None:
+            left_col_flowables.append(profile_img)
+            left_col_flowables.append(Spacer(1, 10))
+    left_col_flowables += side_sections(
+        content, styles['left_heading'], styles['left_body'], gap=10,
+        titles=("PROFILE", "SKILLS", "LANGUAGES"),
+    )
+    left_table = Table([[flow] for flow in left_col_flowables],
+                       colWidths=[2.2 * inch],
+                       splitByRow=True)
+    left_table.setStyle(theme.table_styles['sidebar'])
+
+    # Name, job title and contact info head the right column
+    right_col_flowables = []
+    if content.name:
+        right_col_flowables.append(Paragraph(content.name, styles['name']))
+    if content.job_title:
+        right_col_flowables.append(Paragraph(content.job_title, styles['title']))
+    if content.contact_items:
+        right_col_flowables.append(Paragraph(" | ".join(content.contact_items), styles['body']))
+        right_col_flowables.append(Spacer(1, 8))
+    right_col_flowables += main_sections(
+        content, styles['section_heading'], styles['body'], styles['info'], styles['body'],
+        inline_company=True,
+    )
+
+    main_table = Table([
+        [left_table, right_col_flowables]
+    ], colWidths=[2.7 * inch, 5.6 * inch])
+    main_table.setStyle(theme.table_styles['main'])
+    return [main_table]
+
+def build_columns_story(theme, content, width):
+    """Two ruled columns with no header"""
+    styles = theme.styles
+
+    left_elements = []
+    if content.photo:
+        profile_img = profile_image(content.photo)
+        if profile_img is not None:
+            img_table = Table([[profile_img]], colWidths=[2*inch])
+            img_table.setStyle(theme.table_styles['photo'])
+            left_elements.append(img_table)
+            left_elements.append(Spacer(1, 15))
+    left_elements += side_sections(content, styles['section_heading'], styles['body'], gap=15)
+    right_elements = main_sections(
+        content, styles['section_heading'], styles['body'], styles['info'], styles['info'],
+        inline_company=True,
+    )
+
+    content_table = Table([[left_elements, right_elements]],
+                          colWidths=[2.3*inch, 5.6*inch],
+                          splitByRow=True)
+    content_table.setStyle(theme.table_styles['columns'])
+    return [content_table]
+
+def build_classic_story(theme, content, width):
+    """Name and contact header, a horizontal rule, then the two columns"""
+    styles = theme.styles
+
+    header_left = [
+        Paragraph(content.name, styles['name']),
+        Paragraph(content.job_title, styles['title']),
+    ]
+    header_right = [Paragraph(item, styles['contact']) for item in content.contact_items]
+    header_table = Table([[header_left, header_right]], colWidths=[2.7*inch, 5.6*inch], splitByRow=True)
+    header_table.setStyle(theme.table_styles['header'])
+
+    # Horizontal line under the header
+    line_table = Table([['']], colWidths=[8*inch])
+    line_table.setStyle(theme.table_styles['rule'])
+
+    return [
+        header_table,
+        Spacer(1, 5),
+        line_table,
+        Spacer(1, 12),
+    ] + build_columns_story(theme, content, width)
+
+LAYOUTS = {
+    'banner': build_banner_story,
+    'sidebar': build_sidebar_story,
+    'columns': build_columns_story,
+    'classic': build_classic_story,
+}
+
+def init_worker():
+    """Process pool initializer: build the theme registry before the first job arrives"""
+    load_themes()
+
+def render_resume_pdf(payload: RenderPayload) -> RenderResult:
+    """
+    Render one resume to PDF. Runs inside a render worker process, so it only
+    depends on the picklable payload and returns the document bytes (or the
+    path of a spool file for very large documents).
+    """
+    if not payload.profile:
+        return build_resume_pdf(payload)
+    profiler = cProfile.Profile()
+    result = profiler.runcall(build_resume_pdf, payload)
+    result.profile = profile_bytes(profiler)
+    return result
+
+def build_resume_pdf(payload: RenderPayload) -> RenderResult:
+    timings = {}
+    theme = get_theme(payload.theme)
+    content = ResumeContent(payload)
+    build_layout = LAYOUTS[theme.layout]
+
+    if content.photo:
+        # Process the photo up front so its cost is reported on its own; the
+        # layouts then find it in the photo cache
+        with timed_stage(timings, "photo"):
+            profile_image(content.photo)
+
+    # The PDF is written to memory and only rolls over to disk for very large outputs
+    pdf_spool = new_spool()
+
+    # Width available to the flowables; it does not depend on the page height
+    content_width = A4[0] - 20*mm
+
+    def build_story():
+        return build_layout(theme, content, content_width)
+
+
+    def make_doc(page_height):
+        # Create the PDF document with custom settings
+        doc = SimpleDocTemplate(
+            pdf_spool,
+            pagesize=(A4[0], page_height),
+            rightMargin=10*mm,
+            leftMargin=10*mm,
+            topMargin=0*mm,
+            bottomMargin=0*mm,
+            allowSplitting=0,  # Disable page splitting
+            displayDocTitle=True,
+            pageCompression=0,  # Disable page compression
+            showBoundary=0,  # Hide page boundaries
+            invariant=1,  # Byte-identical output for identical input (keeps ETags strong)
+        )
+
+        # Create a basic template for single page
+        frame = Frame(
+            doc.leftMargin, 
+            doc.bottomMargin,
+            doc.width,
+            doc.height,
+            leftPadding=0,
+            rightPadding=0,
+            topPadding=0,
+            bottomPadding=0,
+            showBoundary=0,
+            id='normal'
+        )
+
+        # Create a template that uses the frame
+        template = PageTemplate(
+            id='OneCol',
+            frames=[frame],
+            onPage=lambda canvas, doc: None
+        )
+        doc.addPageTemplates([template])
+        return doc
+
+    # Size the page to the measured story and build it (normally exactly once)
+    try:
+        render_builds = build_single_page_pdf(build_story, make_doc, content_width, pdf_spool, timings)
+    except Exception:
+        pdf_spool.close()
+        raise
+
+    with timed_stage(timings, "output"):
+        pdf_size = pdf_spool.tell()
+        if pdf_size > PDF_SPOOL_MAX_MEMORY:
+            # Too large to hand back through the pool's pipe; the caller streams
+            # the spool file and deletes it
+            return RenderResult(
+                size=pdf_size, builds=render_builds, path=spool_to_file(pdf_spool), timings=timings
+            )
+
+        pdf_spool.seek(0)
+        pdf_bytes = pdf_spool.read()
+        pdf_spool.close()
+    return RenderResult(size=pdf_size, builds=render_builds, data=pdf_bytes, timings=timings)
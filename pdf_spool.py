@@ -0,0 +1,76 @@
+# pdf_spool.py
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterator
+
+# PDFs up to this size are built and served entirely from memory; larger
+# outputs roll over to an anonymous file in PDF_SPOOL_DIR.
+PDF_SPOOL_MAX_MEMORY = int(os.environ.get("PDF_SPOOL_MAX_MEMORY", 8 * 1024 * 1024))
+PDF_SPOOL_DIR = os.environ.get(
+    "PDF_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "cv_maker_pdf_spool")
+)
+STREAM_CHUNK_SIZE = 64 * 1024
+# Named spool files are streamed and removed within moments of being
+# written; anything older than this was left behind by a crashed process.
+# Every app process shares the directory, so younger files may still be in
+# use by another one and are left alone.
+PDF_SPOOL_STALE_SECONDS = int(os.environ.get("PDF_SPOOL_STALE_SECONDS", 600))
+
+
+def new_spool():
+    """Return a file object that stays in memory until PDF_SPOOL_MAX_MEMORY is exceeded."""
+    os.makedirs(PDF_SPOOL_DIR, exist_ok=True)
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY, dir=PDF_SPOOL_DIR)
+
+
+def clean_spool_dir() -> None:
+    """Remove spool files older than PDF_SPOOL_STALE_SECONDS, left behind by crashed processes."""
+    if not os.path.isdir(PDF_SPOOL_DIR):
+        return
+    cutoff = time.time() - PDF_SPOOL_STALE_SECONDS
+    for entry in os.scandir(PDF_SPOOL_DIR):
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            # Another process finished with it or cleaned it up first
+            continue
+        except OSError as e:
+            print(f"Error removing spool file {entry.path}: {e}")
+
+
+def spool_to_file(spool) -> str:
+    """Copy a spool into a named file in PDF_SPOOL_DIR so another process can stream it."""
+    spool.seek(0)
+    with tempfile.NamedTemporaryFile(dir=PDF_SPOOL_DIR, suffix=".pdf", delete=False) as target:
+        shutil.copyfileobj(spool, target)
+    spool.close()
+    return target.name
+
+
+def iter_file(path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a spool file handed over by a render worker and delete it afterwards."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Error removing spool file {path}: {e}")
+
+
+def iter_bytes(data: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
@@ -0,0 +1,38 @@
+# pending_limit.py
+import threading
+from concurrent.futures import Future
+from typing import Type
+
+
+class PendingLimit:
+    """
+    Counts the jobs queued or running on an executor and refuses new ones
+    once `limit` are outstanding, so a burst is turned away instead of
+    queueing without bound. A job's slot is freed when its future finishes,
+    not when the caller stops waiting for it.
+    """
+
+    def __init__(self, limit: int, full: Type[Exception]):
+        self.limit = limit
+        self.full = full
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def acquire(self) -> None:
+        """Take a slot for a job about to be submitted, or raise `full`."""
+        with self._lock:
+            if self._pending >= self.limit:
+                raise self.full()
+            self._pending += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def release_when_done(self, future: Future) -> None:
+        future.add_done_callback(lambda _: self.release())
@@ -0,0 +1,164 @@
+# photo_cache.py
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image, ImageDraw
+from reportlab.lib.utils import ImageReader
+
+PHOTO_CACHE_MAX_BYTES = int(os.environ.get("PHOTO_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+# Photos are downscaled to this resolution for their printed size
+PHOTO_PRINT_DPI = 300
+# Photos with more pixels than this are refused before Pillow decodes them,
+# so one huge (or deliberately crafted) image cannot exhaust a worker's memory
+PHOTO_MAX_PIXELS = int(os.environ.get("PHOTO_MAX_PIXELS", 40_000_000))
+Image.MAX_IMAGE_PIXELS = PHOTO_MAX_PIXELS
+
+
+@lru_cache(maxsize=8)
+def corner_masks(radius: int):
+    """The four quarter-circle alpha masks for a radius, built once and reused."""
+    circle = Image.new('L', (radius*2, radius*2), 0)
+    draw = ImageDraw.Draw(circle)
+    draw.ellipse((0, 0, radius*2, radius*2), fill=255)
+    return (
+        circle.crop((0, 0, radius, radius)),
+        circle.crop((radius, 0, radius*2, radius)),
+        circle.crop((0, radius, radius, radius*2)),
+        circle.crop((radius, radius, radius*2, radius*2)),
+    )
+
+
+def round_corners(image, radius=40):
+    """
+    تابعی برای گرد کردن گوشه‌های تصویر پروفایل.
+    اگر عکس نهایی گوشه‌گرد نمی‌خواهید، این تابع را حذف کنید.
+    """
+    top_left, top_right, bottom_left, bottom_right = corner_masks(radius)
+    alpha = Image.new('L', image.size, 255)
+    w, h = image.size
+
+    alpha.paste(top_left, (0, 0))
+    alpha.paste(top_right, (w-radius, 0))
+    alpha.paste(bottom_left, (0, h-radius))
+    alpha.paste(bottom_right, (w-radius, h-radius))
+    image.putalpha(alpha)
+    return image
+
+
+class ProcessedPhoto:
+    """A rounded, print-sized profile photo and the size to draw it at (in points)."""
+
+    def __init__(self, png: bytes, pixel_size, width: float, height: float):
+        self.png = png
+        self.pixel_size = pixel_size
+        self.width = width
+        self.height = height
+        self._reader = None
+
+    @property
+    def nbytes(self) -> int:
+        # The PNG plus the RGB and alpha data ReportLab keeps once it has drawn it
+        w, h = self.pixel_size
+        return len(self.png) + w * h * 4
+
+    def reader(self) -> ImageReader:
+        """ImageReader shared by every render, so the PNG is only decoded once."""
+        if self._reader is None:
+            self._reader = ImageReader(io.BytesIO(self.png))
+        return self._reader
+
+
+def process_photo(photo_bytes: bytes, max_size: float, radius: int) -> ProcessedPhoto:
+    # open() only reads the header; the pixels are decoded by convert()
+    pil_image = Image.open(io.BytesIO(photo_bytes))
+    if pil_image.width * pil_image.height > PHOTO_MAX_PIXELS:
+        raise ValueError(f"Photo is too large ({pil_image.width}x{pil_image.height} pixels)")
+    pil_image = pil_image.convert('RGBA')
+    pil_image = round_corners(pil_image, radius=radius)
+
+    w, h = pil_image.size
+    aspect_ratio = w / float(h)
+    if aspect_ratio > 1:
+        new_w = max_size
+        new_h = max_size / aspect_ratio
+    else:
+        new_h = max_size
+        new_w = max_size * aspect_ratio
+
+    # Anything beyond print resolution only makes the PDF bigger
+    max_pixels = int(round(max_size / 72 * PHOTO_PRINT_DPI))
+    if max(w, h) > max_pixels:
+        pil_image.thumbnail((max_pixels, max_pixels), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    pil_image.save(buf, format='PNG')
+    return ProcessedPhoto(buf.getvalue(), pil_image.size, new_w, new_h)
+
+
+class PhotoCache:
+    """LRU cache of processed photos, bounded by their size in memory."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, ProcessedPhoto]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ProcessedPhoto]:
+        with self._lock:
+            photo = self._entries.get(key)
+            if photo is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return photo
+
+    def put(self, key: str, photo: ProcessedPhoto) -> None:
+        if photo.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.nbytes
+            self._entries[key] = photo
+            self.current_bytes += photo.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+photo_cache = PhotoCache(PHOTO_CACHE_MAX_BYTES)
+
+
+def get_processed_photo(photo_bytes: bytes, max_size: float, radius: int) -> ProcessedPhoto:
+    """Return the processed photo, running Pillow only the first time a photo/size/radius is seen."""
+    digest = hashlib.sha256(photo_bytes).hexdigest()
+    key = f"{digest}:{max_size}:{radius}"
+    photo = photo_cache.get(key)
+    if photo is None:
+        photo = process_photo(photo_bytes, max_size, radius)
+        photo_cache.put(key, photo)
+    return photo
@@ -0,0 +1,86 @@
+# prerender.py
+import asyncio
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+# What to render in the background after a resume is saved:
+#   off  - nothing
+#   last - the theme the resume (or else its owner) was last downloaded in
+#   all  - every theme
+PRERENDER_MODE = os.environ.get("PRERENDER_MODE", "last")
+# Saves closer together than this only trigger one render, after the last save
+PRERENDER_DELAY_SECONDS = float(os.environ.get("PRERENDER_DELAY_SECONDS", 3))
+LAST_THEMES_MAX_ENTRIES = 10000
+
+
+class LastThemes:
+    """Bounded record of the theme each resume and each user last downloaded."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, user_id: int, resume_id: int, theme: str) -> None:
+        with self._lock:
+            for key in (("resume", resume_id), ("user", user_id)):
+                self._entries.pop(key, None)
+                self._entries[key] = theme
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id: int, resume_id: int) -> Optional[str]:
+        with self._lock:
+            theme = self._entries.get(("resume", resume_id))
+            if theme is None:
+                theme = self._entries.get(("user", user_id))
+            return theme
+
+    def forget_resume(self, resume_id: int) -> None:
+        with self._lock:
+            self._entries.pop(("resume", resume_id), None)
+
+
+class Debouncer:
+    """
+    Runs a job for a key once no newer job has been scheduled for that key
+    for `delay` seconds. Scheduling again before then replaces the waiting
+    job; a job that has already started is left to finish.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._waiting: Dict[Hashable, asyncio.Task] = {}
+
+    def schedule(self, key: Hashable, job: Callable[[], Awaitable]) -> None:
+        self.cancel(key)
+        # A fresh context: the job must not run under the scheduling request's
+        # profiler or add its queries to that request's statistics
+        self._waiting[key] = asyncio.get_running_loop().create_task(
+            self._run(key, job), context=contextvars.Context()
+        )
+
+    def cancel(self, key: Hashable) -> None:
+        task = self._waiting.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self) -> None:
+        for key in list(self._waiting):
+            self.cancel(key)
+
+    async def _run(self, key: Hashable, job: Callable[[], Awaitable]) -> None:
+        await asyncio.sleep(self.delay)
+        if self._waiting.get(key) is asyncio.current_task():
+            del self._waiting[key]
+        try:
+            await job()
+        except Exception as e:
+            print(f"Background job {key!r} failed: {e}")
+
+
+last_themes = LastThemes(LAST_THEMES_MAX_ENTRIES)
+prerender_debouncer = Debouncer(PRERENDER_DELAY_SECONDS)
@@ -0,0 +1,228 @@
+# preview_renderer.py
+import base64
+from html import escape
+from typing import List
+from urllib.parse import urlsplit
+
+from blob_store import sniff_media_type
+from render_executor import RenderPayload
+from theme_palettes import get_theme_info
+
+# Bump this whenever the preview HTML changes so cached previews are not reused.
+PREVIEW_VERSION = "2"
+
+# Page furniture shared by every layout; the colours come from the theme
+# palette through CSS variables, so each theme only changes the variables
+BASE_CSS = """
+* { box-sizing: border-box; }
+body { margin: 0; background: #E0E0E0; font: 10pt/1.4 Helvetica, Arial, sans-serif; color: var(--text); }
+.page { width: 210mm; min-height: 297mm; margin: 0 auto; background: #FFFFFF; }
+h1 { margin: 0 0 6px; font-size: 24pt; line-height: 1.15; color: var(--name); }
+.job-title { margin: 0 0 12px; font-size: 14pt; font-weight: bold; color: var(--title); }
+.contact { color: var(--contact); }
+h2 { margin: 12px 0 6px; font-size: 13pt; color: var(--heading); }
+p { margin: 0; }
+.info { font-size: 9pt; color: var(--info); }
+.entry { margin-bottom: 10px; }
+.photo { display: block; width: 120px; height: 120px; margin-bottom: 15px; border-radius: 50%; object-fit: cover; }
+.columns { display: grid; }
+.columns > section { padding: 15px 20px; }
+.columns > section + section { border-left: 0.5px solid var(--rule); }
+"""
+
+# Project links are only made clickable for these schemes; anything else
+# (javascript:, data:, ...) is shown as plain text
+LINK_SCHEMES = ('http', 'https', 'mailto')
+
+LAYOUT_CSS = {
+    'banner': """
+header { padding: 20px 30px; background: var(--header-background); }
+.columns { grid-template-columns: 35% 65%; }
+h2 { border-bottom: 1px solid var(--heading-border); padding-bottom: 2px; }
+""",
+    'sidebar': """
+.page { display: grid; grid-template-columns: 2.7in 1fr; }
+aside { padding: 20px; background: var(--sidebar-background); color: var(--sidebar-text); }
+aside h2 { color: var(--sidebar-text); }
+main { padding: 20px 20px 20px 25px; }
+""",
+    'columns': """
+.columns { grid-template-columns: 2.3in 1fr; }
+h2 { padding: 2px 4px; background: var(--heading-background, transparent); font-size: 12pt; }
+.photo { margin: 0 auto 15px; }
+""",
+    'classic': """
+header { display: grid; grid-template-columns: 2.7in 1fr; padding: 20px 20px 5px; border-bottom: 1px solid var(--header-rule); }
+header .contact { text-align: right; }
+.columns { grid-template-columns: 2.3in 1fr; }
+.photo { margin: 0 auto 15px; }
+""",
+}
+
+
+def css_variables(palette: dict) -> str:
+    # Banner themes colour the job title and info lines with the primary colour
+    colours = {'title': palette['primary'], 'info': palette['primary']}
+    colours.update(palette)
+    return ":root { " + " ".join(
+        f"--{key.replace('_', '-')}: {value};" for key, value in colours.items()
+    ) + " }"
+
+
+def photo_tag(photo: bytes) -> str:
+    """The photo inlined as a data URI, so the page needs no authenticated request."""
+    encoded = base64.b64encode(photo).decode('ascii')
+    return f'<img class="photo" src="data:{sniff_media_type(photo)};base64,{encoded}" alt="">'
+
+
+def period(item: dict) -> str:
+    end = 'Present' if item.get('is_current') else item.get('end_date', '')
+    return f"{item.get('start_date', '')} - {end}"
+
+
+def side_sections(payload: RenderPayload, titles=("Profile", "Skills", "Languages")) -> List[str]:
+    """Profile, skills and languages for the narrow column"""
+    html = []
+    profile_title, skills_title, languages_title = titles
+    if (payload.summary or '').strip():
+        html.append(f"<h2>{profile_title}</h2><p>{escape(payload.summary)}</p>")
+    if payload.skills:
+        html.append(f"<h2>{skills_title}</h2>")
+        for skill in payload.skills:
+            line = skill.get('skill', '')
+            if skill.get('proficiency'):
+                line += f" ({skill['proficiency']})"
+            html.append(f"<p>• {escape(line)}</p>")
+    if payload.languages:
+        html.append(f"<h2>{languages_title}</h2>")
+        for language in payload.languages:
+            html.append(f"<p>• {escape(language.get('language', ''))} - {escape(language.get('proficiency', ''))}</p>")
+    return html
+
+
+def main_sections(payload: RenderPayload, inline_company: bool) -> List[str]:
+    """Experience, education, projects and certifications for the wide column"""
+    html = []
+    for title, items, heading_key, place_key in (
+        ("Experience", payload.experience, 'position', 'company'),
+        ("Education", payload.education, 'degree', 'institution'),
+    ):
+        if not items:
+            continue
+        html.append(f"<h2>{title}</h2>")
+        for item in items:
+            heading = escape(item.get(heading_key, ''))
+            place = escape(item.get(place_key, ''))
+            html.append('<div class="entry">')
+            if inline_company:
+                html.append(f"<p><b>{heading}</b> - {place}</p>")
+            else:
+                html.append(f'<p><b>{heading}</b></p><p class="info">{place}</p>')
+            html.append(f'<p class="info">{escape(period(item))}</p>')
+            if item.get('description', '').strip():
+                html.append(f"<p>{escape(item['description'])}</p>")
+            html.append('</div>')
+    if payload.projects:
+        html.append("<h2>Projects</h2>")
+        for project in payload.projects:
+            html.append(f'<div class="entry"><p><b>{escape(project.get("name", ""))}</b></p>')
+            link = project.get('link', '')
+            if link:
+                html.append(f'<p class="info">Link: {link_html(link)}</p>')
+            if project.get('description', '').strip():
+                html.append(f"<p>{escape(project['description'])}</p>")
+            html.append('</div>')
+    if payload.certifications:
+        html.append("<h2>Certifications</h2>")
+        for cert in payload.certifications:
+            html.append(
+                f'<div class="entry"><p><b>{escape(cert.get("title", ""))}</b></p>'
+                f'<p class="info">Issuer: {escape(cert.get("issuer", ""))}</p>'
+                f'<p class="info">Date: {escape(cert.get("date", ""))}</p></div>'
+            )
+    return html
+
+
+def link_html(link: str) -> str:
+    """A link to the URL if its scheme is a safe one, otherwise the URL as text"""
+    try:
+        scheme = urlsplit(link.strip()).scheme.lower()
+    except ValueError:
+        scheme = ''
+    if scheme not in LINK_SCHEMES:
+        return escape(link)
+    return f'<a href="{escape(link.strip())}">{escape(link)}</a>'
+
+
+def identity(payload: RenderPayload) -> List[str]:
+    """Name and job title"""
+    html = []
+    if payload.full_name:
+        html.append(f"<h1>{escape(payload.full_name)}</h1>")
+    if payload.title:
+        html.append(f'<p class="job-title">{escape(payload.title)}</p>')
+    return html
+
+
+def contact_items(payload: RenderPayload) -> List[str]:
+    return [escape(item) for item in (payload.city, payload.phone, payload.email) if item]
+
+
+def columns(payload: RenderPayload, inline_company: bool) -> str:
+    left = [photo_tag(payload.photo)] if payload.photo else []
+    left += side_sections(payload)
+    right = main_sections(payload, inline_company)
+    return f'<div class="columns"><section>{"".join(left)}</section><section>{"".join(right)}</section></div>'
+
+
+def banner_body(payload: RenderPayload) -> str:
+    header = identity(payload)
+    if contact_items(payload):
+        header.append(f'<p class="contact">{" | ".join(contact_items(payload))}</p>')
+    return f'<header>{"".join(header)}</header>' + columns(payload, inline_company=False)
+
+
+def sidebar_body(payload: RenderPayload) -> str:
+    left = [photo_tag(payload.photo)] if payload.photo else []
+    left += side_sections(payload, titles=("PROFILE", "SKILLS", "LANGUAGES"))
+    right = identity(payload)
+    if contact_items(payload):
+        right.append(f'<p class="entry">{" | ".join(contact_items(payload))}</p>')
+    right += main_sections(payload, inline_company=True)
+    return f'<aside>{"".join(left)}</aside><main>{"".join(right)}</main>'
+
+
+def columns_body(payload: RenderPayload) -> str:
+    return columns(payload, inline_company=True)
+
+
+def classic_body(payload: RenderPayload) -> str:
+    contact = "".join(f'<p class="contact">{item}</p>' for item in contact_items(payload))
+    return (
+        f'<header><div>{"".join(identity(payload))}</div><div>{contact}</div></header>'
+        + columns(payload, inline_company=True)
+    )
+
+
+LAYOUTS = {
+    'banner': banner_body,
+    'sidebar': sidebar_body,
+    'columns': columns_body,
+    'classic': classic_body,
+}
+
+
+def render_resume_html(payload: RenderPayload) -> str:
+    """
+    Render the resume as a standalone HTML page laid out like its PDF. The
+    page is built from the same theme palette and layout as the PDF, without
+    ReportLab, so it is cheap enough to regenerate on every edit.
+    """
+    theme = get_theme_info(payload.theme)
+    title = escape(payload.full_name or "Resume")
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{title}</title>'
+        f'<style>{css_variables(theme.palette)}{BASE_CSS}{LAYOUT_CSS[theme.layout]}</style>'
+        f'</head><body><div class="page">{LAYOUTS[theme.layout](payload)}</div></body></html>'
+    )
@@ -0,0 +1,149 @@
+# profiling.py
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import re
+import tempfile
+import uuid
+from contextvars import ContextVar
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+# Operators profile a single request by sending this token in the
+# X-Profile header (or a ?profile= query parameter). Unset disables profiling.
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "cv_maker_profiles"))
+# Only the most recent profiles are kept
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 50))
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ProfileSession:
+    """Profiles collected while handling one request: the app's own and any from render workers."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.worker_profiles: List[bytes] = []
+
+
+# Set while a profiled request is being handled, so the render executor
+# knows to profile the worker side of its renders as well
+current_profile: ContextVar[Optional[ProfileSession]] = ContextVar("current_profile", default=None)
+
+
+def profiling_allowed(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def profile_bytes(profiler: cProfile.Profile) -> bytes:
+    """The profile in the format pstats reads (what Profile.dump_stats writes)."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+class _LoadedProfile:
+    """Lets pstats.Stats load a profile serialized by profile_bytes."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self) -> None:
+        pass
+
+
+def save_profile(session: ProfileSession, profiler: cProfile.Profile) -> str:
+    """Merge the request's profiles into one pstats file and return its path."""
+    stats = pstats.Stats(profiler)
+    for data in session.worker_profiles:
+        stats.add(_LoadedProfile(data))
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{session.id}.prof")
+    stats.dump_stats(path)
+    prune_profiles()
+    return path
+
+
+def prune_profiles() -> None:
+    entries = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except OSError as e:
+            print(f"Error removing profile {entry.path}: {e}")
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
+
+
+def profile_text(path: str, sort: str = "cumulative", limit: int = 60) -> str:
+    """A readable summary of a stored profile: the top functions by the given sort key."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+class ProfileMiddleware:
+    """
+    Runs a request under cProfile when it carries the operator token. The
+    profile covers the event loop thread for the whole request, plus the
+    worker side of any PDF it renders, and is stored under PROFILE_DIR; the
+    response names it in the X-Profile-Id header. Other requests running on
+    the loop at the same time show up in the profile too, so profile on a
+    quiet instance where possible.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # cProfile can only profile one request at a time on the loop thread
+        self.active = False
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http" or not PROFILE_TOKEN or self.active
+            # Fetching a profile would otherwise store a profile of itself
+            or scope["path"].startswith("/profiles/")
+            or not profiling_allowed(request_token(scope))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self.active = True
+        token = current_profile.set(session)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            current_profile.reset(token)
+            self.active = False
+            path = save_profile(session, profiler)
+            print(f"Saved profile of {scope['method']} {scope['path']} to {path}")
+
+
+def request_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return value.decode("latin-1")
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+    return values[0] if values else None
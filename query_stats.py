@@ -0,0 +1,142 @@
+# query_stats.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+
+from metrics import LATENCY_BUCKETS, Counter, Histogram, registry
+
+# Statements slower than this are logged with their parameters and route
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 200))
+# Longest parameter listing written to the slow query log
+SLOW_QUERY_MAX_PARAMS_CHARS = 500
+
+queries_per_request = registry.register(Histogram(
+    "cv_db_queries_per_request", "SQL statements issued while handling a request",
+    (0, 1, 2, 3, 5, 8, 13, 21, 50, 100), labels=("route",),
+))
+query_time_per_request = registry.register(Histogram(
+    "cv_db_query_seconds_per_request", "Time spent in SQL statements while handling a request",
+    LATENCY_BUCKETS, labels=("route",),
+))
+slow_queries_total = registry.register(Counter(
+    "cv_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS", labels=("route",),
+))
+
+
+class QueryStats:
+    """Statements counted for one request (or one assert_max_queries block)."""
+
+    def __init__(self, scope=None, keep_statements: bool = False):
+        self.scope = scope
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+        # The parameters each kept statement ran with
+        self.parameters: Optional[List[Any]] = [] if keep_statements else None
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "background"
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+    def add(self, statement: str, ms: float, parameters: Any = None) -> None:
+        # Sync endpoints run their queries in worker threads
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            if self.statements is not None:
+                self.statements.append(statement)
+                self.parameters.append(parameters)
+
+
+# Statistics of the request being handled; background jobs have none
+current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+# Open assert_max_queries blocks, which see statements from every thread
+_recorders: List[QueryStats] = []
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    stats = current_queries.get()
+    if stats is not None:
+        stats.add(statement, ms)
+    for recorder in list(_recorders):
+        recorder.add(statement, ms, parameters)
+    if ms >= SLOW_QUERY_MS:
+        route = stats.route if stats is not None else "background"
+        slow_queries_total.inc(route=route)
+        params = repr(parameters)
+        if len(params) > SLOW_QUERY_MAX_PARAMS_CHARS:
+            params = params[:SLOW_QUERY_MAX_PARAMS_CHARS] + "..."
+        print(f"Slow query ({ms:.0f} ms, {route}): {' '.join(statement.split())} {params}")
+
+
+def handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement run on a sync engine (use async_engine.sync_engine for async ones)."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+def record_request(stats: QueryStats) -> None:
+    queries_per_request.observe(stats.count, route=stats.route)
+    query_time_per_request.observe(stats.total_ms / 1000, route=stats.route)
+
+
+class QueryStatsMiddleware:
+    """Collects per-request statement counts and time into the request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats(scope)
+        token = current_queries.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_queries.reset(token)
+            record_request(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Fail when the block runs more than `limit` statements, listing them. For
+    tests: it counts statements from every thread, so it also sees requests
+    made through TestClient. The recorder it yields keeps each statement and
+    its parameters.
+
+        with assert_max_queries(2):
+            client.get("/resumes/1", headers=auth)
+    """
+    recorder = QueryStats(keep_statements=True)
+    _recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorders.remove(recorder)
+    if recorder.count > limit:
+        listing = "\n".join(f"  {i + 1}. {' '.join(s.split())}" for i, s in enumerate(recorder.statements))
+        raise AssertionError(f"Expected at most {limit} queries, {recorder.count} ran:\n{listing}")
@@ -0,0 +1,131 @@
+# render_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from theme_palettes import get_theme_info
+
+# Bump this whenever the PDF layout changes so old renders are not served.
+RENDERER_VERSION = "4"
+
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Resumes invalidated recently enough to still refuse renders started before
+INVALIDATION_HISTORY = 10000
+
+def compute_render_key(resume, theme: Optional[str]) -> str:
+    """
+    Cache key of a render. Every write bumps the resume's version, so the
+    owner, render token, version and theme identify the PDF exactly without
+    reading the content. The render token is random and never reused, so a
+    new resume that gets a deleted one's id can never match its renders.
+    Unknown themes render as the default one and share its key.
+    """
+    content = [RENDERER_VERSION, resume.user_id, resume.id, resume.render_token, resume.version,
+               get_theme_info(theme).name]
+    return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    LRU cache of rendered PDFs, bounded by the total size of the stored bytes.
+    Entries are also indexed by resume id so they can be dropped when the
+    resume is updated or deleted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_resume: Dict[int, Set[str]] = {}
+        # When each resume was last invalidated, counted in invalidations.
+        # Only the most recent are remembered; a render started before the
+        # oldest remembered one cannot tell if its resume changed meanwhile.
+        self._invalidations = 0
+        self._invalidated: "OrderedDict[int, int]" = OrderedDict()
+        self._forgotten_before = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def contains(self, key: str) -> bool:
+        """Check for an entry without counting a hit or miss or refreshing it."""
+        with self._lock:
+            return key in self._entries
+
+    def epoch(self) -> int:
+        """
+        Take this before reading a resume to render it, and pass it to put():
+        renders of a resume that was updated or deleted in the meantime are
+        then not stored.
+        """
+        with self._lock:
+            return self._invalidations
+
+    def put(self, key: str, resume_id: int, data: bytes, epoch: int) -> None:
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if epoch < self._forgotten_before or self._invalidated.get(resume_id, -1) >= epoch:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (resume_id, data)
+            self._by_resume.setdefault(resume_id, set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_resume(self, resume_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_resume.get(resume_id, ())):
+                self._remove(key)
+            self._invalidated.pop(resume_id, None)
+            self._invalidated[resume_id] = self._invalidations
+            self._invalidations += 1
+            if len(self._invalidated) > INVALIDATION_HISTORY:
+                _, forgotten = self._invalidated.popitem(last=False)
+                self._forgotten_before = forgotten + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_resume.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, key: str) -> None:
+        resume_id, data = self._entries.pop(key)
+        self.current_bytes -= len(data)
+        keys = self._by_resume.get(resume_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_resume[resume_id]
+
+
+render_cache = RenderCache(RENDER_CACHE_MAX_BYTES)
@@ -0,0 +1,203 @@
+# render_executor.py
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional
+
+from blob_store import get_blob
+from metrics import record_render
+from pending_limit import PendingLimit
+from profiling import current_profile
+from theme_palettes import get_theme_info
+
+RENDER_POOL_SIZE = int(os.environ.get("RENDER_POOL_SIZE", os.cpu_count() or 1))
+# Maximum number of renders running or waiting for a worker; more are rejected
+RENDER_QUEUE_SIZE = int(os.environ.get("RENDER_QUEUE_SIZE", RENDER_POOL_SIZE * 4))
+# How long a caller waits for its render. This only stops the wait: the
+# worker finishes the timed-out job anyway (it cannot be interrupted without
+# killing the worker), and the job keeps its worker and its
+# RENDER_QUEUE_SIZE slot until then
+RENDER_TIMEOUT_SECONDS = float(os.environ.get("RENDER_TIMEOUT_SECONDS", 60))
+# Workers are started from a clean server process rather than forked from
+# the app, which runs threads (password hashing, aiosqlite, the threadpool)
+# that a fork can deadlock on and holds database handles and caches the
+# workers have no use for; init_worker builds what a worker needs
+RENDER_START_METHOD = os.environ.get(
+    "RENDER_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+
+@dataclass
+class RenderPayload:
+    """Everything a worker process needs to render one resume."""
+    resume_id: int
+    theme: str
+    full_name: Optional[str] = None
+    title: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    city: Optional[str] = None
+    summary: Optional[str] = None
+    # Sections arrive as the validated item lists stored on the resume
+    experience: Optional[list] = None
+    education: Optional[list] = None
+    skills: Optional[list] = None
+    projects: Optional[list] = None
+    certifications: Optional[list] = None
+    languages: Optional[list] = None
+    photo: Optional[bytes] = None
+    # Run the render under cProfile and return the profile with the result
+    profile: bool = False
+
+
+def render_payload(resume, theme: str, photo: Optional[bytes] = None) -> RenderPayload:
+    """Build the payload for a models.Resume; pass photo to reuse bytes already read."""
+    if photo is None and resume.photo_hash:
+        photo = get_blob(resume.photo_hash)
+    return RenderPayload(
+        resume_id=resume.id,
+        theme=theme,
+        full_name=resume.full_name,
+        title=resume.title,
+        phone=resume.phone,
+        email=resume.email,
+        city=resume.city,
+        summary=resume.summary,
+        experience=resume.experience,
+        education=resume.education,
+        skills=resume.skills,
+        projects=resume.projects,
+        certifications=resume.certifications,
+        languages=resume.languages,
+        photo=photo,
+    )
+
+
+@dataclass
+class RenderResult:
+    size: int
+    builds: int
+    # Small documents come back in memory, large ones as a spool file path
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+    # Milliseconds spent in each stage of the render, in order
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Serialized cProfile stats when the payload asked for profiling
+    profile: Optional[bytes] = None
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+class RenderTimeout(Exception):
+    pass
+
+
+class RenderExecutor:
+    """
+    Runs PDF renders in a dedicated process pool so ReportLab and Pillow
+    never block the event loop. The number of queued and running jobs is
+    bounded, and callers stop waiting after a per-job timeout.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = PendingLimit(max_pending, RenderQueueFull)
+        self._lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        self._pending.acquire()
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (killed, or out of memory) since the last job
+                # and took the pool down with it; this job goes to a new one
+                self._discard_pool(pool)
+                pool = self._get_pool()
+                future = pool.submit(fn, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        # Timed-out jobs keep their slot until the worker is done with them
+        self._pending.release_when_done(future)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise RenderTimeout()
+        except BrokenProcessPool:
+            # The jobs that were on the pool when a worker died fail, but later
+            # renders get a fresh pool instead of failing until a restart
+            self._discard_pool(pool)
+            raise
+
+    def busy(self) -> bool:
+        """True when every worker already has a job, so new work would have to queue."""
+        return self._pending.pending >= self.workers
+
+    async def render(self, payload: RenderPayload) -> RenderResult:
+        from pdf_renderer import render_resume_pdf
+        # Unknown theme names render as the default theme; label them that way
+        # so user input cannot create new metric series
+        theme = get_theme_info(payload.theme).name
+        profile_session = current_profile.get()
+        if profile_session is not None:
+            payload = replace(payload, profile=True)
+        start = time.perf_counter()
+        try:
+            result = await self.run(render_resume_pdf, payload)
+        except RenderQueueFull:
+            record_render(theme, "rejected")
+            raise
+        except RenderTimeout:
+            record_render(theme, "timeout")
+            raise
+        except Exception:
+            record_render(theme, "error")
+            raise
+        elapsed = time.perf_counter() - start
+        # Whatever the worker did not account for was spent waiting for a
+        # free worker and passing the job and result between processes
+        result.timings = {"queue": max(0.0, elapsed * 1000 - sum(result.timings.values())), **result.timings}
+        record_render(theme, "ok", elapsed, result)
+        if profile_session is not None and result.profile is not None:
+            profile_session.worker_profiles.append(result.profile)
+        return result
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                from pdf_renderer import init_worker
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+                    initializer=init_worker,
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next job starts a new one (unless another caller already did)."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        print("Render worker died; starting a new render pool")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+render_executor = RenderExecutor(RENDER_POOL_SIZE, RENDER_QUEUE_SIZE, RENDER_TIMEOUT_SECONDS)
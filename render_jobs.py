@@ -0,0 +1,233 @@
+# render_jobs.py
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import undefer_group
+
+import models
+from blob_refs import release_blob
+from blob_store import put_blob, put_blob_file
+from database import AsyncSessionLocal
+from render_cache import compute_render_key, render_cache
+from render_executor import RENDER_TIMEOUT_SECONDS, RenderQueueFull, render_executor, render_payload
+
+# Jobs rendered at the same time by each process; the rest of the render
+# pool stays free for interactive downloads
+RENDER_JOB_WORKERS = int(os.environ.get("RENDER_JOB_WORKERS", 1))
+RENDER_JOB_MAX_ATTEMPTS = int(os.environ.get("RENDER_JOB_MAX_ATTEMPTS", 3))
+# Delay before the first retry; it doubles after every further failure
+RENDER_JOB_RETRY_SECONDS = float(os.environ.get("RENDER_JOB_RETRY_SECONDS", 5))
+# Finished jobs and their PDFs are deleted after this long
+RENDER_JOB_TTL_SECONDS = int(os.environ.get("RENDER_JOB_TTL_SECONDS", 24 * 3600))
+RENDER_JOB_POLL_SECONDS = float(os.environ.get("RENDER_JOB_POLL_SECONDS", 2))
+# A job still "running" after this long lost its process (crash, restart)
+# and is picked up again
+RENDER_JOB_LEASE_SECONDS = RENDER_TIMEOUT_SECONDS * 2 + 30
+EXPIRY_INTERVAL_SECONDS = 60
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def claimable(now: datetime):
+    """Jobs that are due, including running ones whose lease has run out."""
+    job = models.RenderJob
+    return or_(
+        and_(job.status == "queued", job.next_attempt_at <= now),
+        and_(job.status == "running", job.started_at < now - timedelta(seconds=RENDER_JOB_LEASE_SECONDS)),
+    )
+
+
+def next_job_queries(now: datetime):
+    """
+    Lookups for the next job to claim: first running jobs whose lease has run
+    out (they were claimed earliest), then queued jobs in due order. Kept as
+    two queries rather than one over claimable() so each is a range read of
+    an index instead of a scan and sort of the whole table.
+    """
+    job = models.RenderJob
+    return (
+        select(job.id).where(
+            job.status == "running", job.started_at < now - timedelta(seconds=RENDER_JOB_LEASE_SECONDS)
+        ).order_by(job.started_at).limit(1),
+        select(job.id).where(job.status == "queued", job.next_attempt_at <= now).order_by(job.next_attempt_at).limit(1),
+    )
+
+
+class RenderJobWorker:
+    """
+    Processes the render_jobs table. Jobs are claimed with a conditional
+    UPDATE, so several app processes can share one queue, and because the
+    queue lives in the database, queued jobs survive restarts.
+    """
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._work_loop()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._expiry_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake the workers up now instead of at their next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work_loop(self) -> None:
+        while True:
+            try:
+                job_id = await self._claim()
+                if job_id is not None:
+                    await self._process(job_id)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Render job worker error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> Optional[str]:
+        job = models.RenderJob
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            for _ in range(3):
+                job_id = None
+                for query in next_job_queries(now):
+                    job_id = await db.scalar(query)
+                    if job_id is not None:
+                        break
+                if job_id is None:
+                    return None
+                result = await db.execute(
+                    update(job).where(job.id == job_id, claimable(now)).values(
+                        status="running", started_at=now, attempts=job.attempts + 1
+                    )
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    return job_id
+                # Another worker claimed it first
+        return None
+
+    async def _process(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(models.RenderJob, job_id)
+            if job.attempts > RENDER_JOB_MAX_ATTEMPTS:
+                self._finish(job, "failed", error=job.error or "Render did not complete")
+                await db.commit()
+                return
+            cache_epoch = render_cache.epoch()
+            resume = await db.scalar(
+                select(models.Resume).options(undefer_group("content")).where(
+                    models.Resume.id == job.resume_id, models.Resume.user_id == job.user_id
+                )
+            )
+            if resume is None:
+                self._finish(job, "failed", error="Resume not found")
+                await db.commit()
+                return
+            try:
+                digest, size, source = await self._render(resume, job.theme, cache_epoch)
+            except RenderQueueFull:
+                # Not the job's fault: try again shortly without using up an attempt
+                job.status = "queued"
+                job.attempts -= 1
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=1)
+                await db.commit()
+                return
+            except Exception as e:
+                print(f"Render job {job_id} failed (attempt {job.attempts}): {e!r}")
+                job.error = str(e) or type(e).__name__
+                if job.attempts >= RENDER_JOB_MAX_ATTEMPTS:
+                    self._finish(job, "failed", error=job.error)
+                else:
+                    job.status = "queued"
+                    delay = RENDER_JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+                    job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                await db.commit()
+                return
+            job.resume_version = resume.version
+            job.result_hash = digest
+            job.result_size = size
+            self._finish(job, "done")
+            try:
+                await db.commit()
+            finally:
+                # An expire() that saw no job using this digest before the
+                # commit may have deleted the blob; store it once more
+                if isinstance(source, str):
+                    put_blob_file(source)
+                else:
+                    put_blob(source)
+
+    async def _render(self, resume: models.Resume, theme: str, cache_epoch: int):
+        """
+        Render (or reuse a cached render of) the resume into the blob store.
+        Returns the digest, the size and the PDF itself (bytes, or the path
+        of its spool file) for _process to store again after committing.
+        """
+        render_key = compute_render_key(resume, theme)
+        data = render_cache.get(render_key)
+        if data is None:
+            result = await render_executor.render(render_payload(resume, theme))
+            if result.path is not None:
+                return put_blob_file(result.path, keep=True), result.size, result.path
+            data = result.data
+            render_cache.put(render_key, resume.id, data, cache_epoch)
+        return put_blob(data), len(data), data
+
+    @staticmethod
+    def _finish(job: models.RenderJob, status: str, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        job.status = status
+        job.error = error
+        job.finished_at = now
+        job.expires_at = now + timedelta(seconds=RENDER_JOB_TTL_SECONDS)
+
+    async def _expiry_loop(self) -> None:
+        while True:
+            try:
+                await self.expire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error expiring render jobs: {e}")
+            await asyncio.sleep(EXPIRY_INTERVAL_SECONDS)
+
+    async def expire(self) -> int:
+        """Delete finished jobs past their expiry and the PDFs nothing else uses."""
+        job = models.RenderJob
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            expired = (await db.execute(
+                select(job.id, job.result_hash).where(job.expires_at < now)
+            )).all()
+            if not expired:
+                return 0
+            await db.execute(delete(job).where(job.id.in_([row.id for row in expired])))
+            await db.commit()
+            for digest in {row.result_hash for row in expired if row.result_hash}:
+                await release_blob(db, digest)
+        return len(expired)
+
+
+render_job_worker = RenderJobWorker(RENDER_JOB_WORKERS, RENDER_JOB_POLL_SECONDS)
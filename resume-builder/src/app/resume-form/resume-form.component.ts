@@ -1,5 +1,5 @@
 // src/app/resume-form/resume-form.component.ts
-import { Component, OnInit } from '@angular/core';
+import { Component, OnDestroy, OnInit } from '@angular/core';
 import { FormBuilder, FormGroup, Validators, FormArray } from '@angular/forms';
 import { ActivatedRoute, Router } from '@angular/router';
 import { CommonModule } from '@angular/common';
@@ -13,13 +13,15 @@ import { ResumeService } from '../services/resume.service';
   templateUrl: './resume-form.component.html',
   styleUrls: ['./resume-form.component.scss']
 })
-export class ResumeFormComponent implements OnInit {
+export class ResumeFormComponent implements OnInit, OnDestroy {
   resumeForm: FormGroup;
   isEditing = false;
   private resumeId?: number;
   loading = false;
   submitted = false;
   existingPhoto: string | null = null;
+  // Object URL of the stored photo shown in existingPhoto, revoked when replaced
+  private photoObjectUrl: string | null = null;
 
   // Title editing states with index signature
   [key: string]: any;
@@ -71,6 +73,10 @@ export class ResumeFormComponent implements OnInit {
     }
   }
 
+  ngOnDestroy(): void {
+    this.revokePhotoObjectUrl();
+  }
+
   // Getters for form arrays
   get f() {
     return this.resumeForm.controls;
@@ -238,9 +244,11 @@ export class ResumeFormComponent implements OnInit {
             summary_title: resume.summary_title || 'PROFILE'
           });
 
-          // Set the existing photo if available
+          // Set the existing photo if available. The form keeps the photo URL,
+          // which tells the API the photo did not change; the preview needs
+          // the image itself, fetched with the auth header.
           if (resume.photo) {
-            this.existingPhoto = resume.photo;
+            this.loadExistingPhoto(resume.photo);
           }
 
           // Parse JSON fields and populate FormArrays
@@ -353,12 +361,35 @@ export class ResumeFormComponent implements OnInit {
     this.router.navigate(['/resumes']);
   }
 
+  private loadExistingPhoto(photo: string): void {
+    if (photo.startsWith('data:')) {
+      this.existingPhoto = photo;
+      return;
+    }
+    this.resumeService.getResumePhoto(photo).subscribe({
+      next: blob => {
+        this.revokePhotoObjectUrl();
+        this.photoObjectUrl = URL.createObjectURL(blob);
+        this.existingPhoto = this.photoObjectUrl;
+      },
+      error: error => console.error('Error loading photo:', error)
+    });
+  }
+
+  private revokePhotoObjectUrl(): void {
+    if (this.photoObjectUrl) {
+      URL.revokeObjectURL(this.photoObjectUrl);
+      this.photoObjectUrl = null;
+    }
+  }
+
   onFileChange(event: any): void {
     const file = event.target.files[0];
     if (file) {
       const reader = new FileReader();
       reader.onload = () => {
         const result = reader.result as string;
+        this.revokePhotoObjectUrl();
         this.existingPhoto = result; // Update the displayed photo
         this.resumeForm.patchValue({
           photo: result
@@ -174,6 +174,21 @@ export class ResumeService {
     );
   }
 
+  // Resumes carry their photo as an API URL that needs the auth header, so
+  // an <img> cannot load it directly; fetch it here and show it as a blob
+  getResumePhoto(photoUrl: string): Observable<Blob> {
+    const headers = this.getAuthHeaders();
+    return this.http.get(`${this.baseUrl}${photoUrl}`, {
+      responseType: 'blob',
+      headers
+    }).pipe(
+      catchError(error => {
+        console.error('Photo fetch error:', error);
+        return throwError(() => error);
+      })
+    );
+  }
+
   getThemes(): ResumeTheme[] {
     return this.themes;
   }
@@ -1,7 +1,7 @@
 # schemas.py
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, constr, validator
-from datetime import date
+from typing import Optional, List, Literal
+from pydantic import BaseModel, EmailStr, Field, constr, root_validator, validator
+from datetime import date, datetime
 import json
 
 # ----- User Schemas -----
@@ -60,6 +60,28 @@ class LanguageItem(BaseModel):
     proficiency: str
 
 # ----- Resume Schemas -----
+# Sections travel as JSON strings and are stored as JSON lists of items
+SECTION_ITEMS = {
+    "experience": ExperienceItem,
+    "education": EducationItem,
+    "skills": SkillItem,
+    "projects": ProjectItem,
+    "certifications": CertificationItem,
+    "languages": LanguageItem,
+}
+SECTION_FIELDS = tuple(SECTION_ITEMS)
+
+def parse_section(value):
+    """Accept a section as a JSON string (what the frontend sends) or as a list"""
+    if isinstance(value, str):
+        if not value.strip():
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            raise ValueError('must be a JSON list')
+    return value
+
 class ResumeBase(BaseModel):
     full_name: Optional[str] = None
     email: Optional[str] = None
@@ -76,15 +98,116 @@ class ResumeBase(BaseModel):
     photo: Optional[str] = None
 
 class ResumeCreate(ResumeBase):
-    pass
+    """A resume as written by the client; every section item is validated here"""
+    experience: Optional[List[ExperienceItem]] = None
+    education: Optional[List[EducationItem]] = None
+    skills: Optional[List[SkillItem]] = None
+    projects: Optional[List[ProjectItem]] = None
+    certifications: Optional[List[CertificationItem]] = None
+    languages: Optional[List[LanguageItem]] = None
+
+    _parse_sections = validator(*SECTION_FIELDS, pre=True, allow_reuse=True)(parse_section)
+
+    def to_columns(self) -> dict:
+        """Column values for models.Resume, with sections as lists of plain dicts"""
+        data = self.dict(exclude=set(SECTION_FIELDS))
+        for field in SECTION_FIELDS:
+            items = getattr(self, field)
+            data[field] = None if items is None else [item.dict(exclude_none=True) for item in items]
+        return data
+
+class SectionItemOp(BaseModel):
+    """Add, replace or remove a single item of one section"""
+    section: str
+    op: Literal["add", "replace", "remove"]
+    # Position of the item; "add" appends when it is left out
+    index: Optional[int] = Field(None, ge=0)
+    item: Optional[dict] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_op(cls, values):
+        section, op = values["section"], values["op"]
+        if section not in SECTION_ITEMS:
+            raise ValueError(f"unknown section {section!r}")
+        if op != "add" and values.get("index") is None:
+            raise ValueError(f"{op} needs an index")
+        if op == "remove":
+            values["item"] = None
+        elif values.get("item") is None:
+            raise ValueError(f"{op} needs an item")
+        else:
+            values["item"] = SECTION_ITEMS[section](**values["item"]).dict(exclude_none=True)
+        return values
+
+class ResumePatch(ResumeCreate):
+    """Only the fields that changed; sections are replaced whole or edited through ops"""
+    ops: List[SectionItemOp] = []
+
+    def changed_columns(self) -> dict:
+        sent = self.__fields_set__ - {"ops"}
+        return {key: value for key, value in self.to_columns().items() if key in sent}
+
+class ResumePatchResult(BaseModel):
+    id: int
+    version: int
+    updated: List[str]
+    # Only sent when the photo changed
+    photo: Optional[str] = None
+
+class ExportEntry(BaseModel):
+    resume_id: int
+    theme: Optional[str] = None
+
+class ExportRequest(BaseModel):
+    entries: List[ExportEntry] = Field(..., min_items=1)
+
+class RenderJob(BaseModel):
+    id: str
+    resume_id: int
+    theme: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    resume_version: Optional[int] = None
+    result_size: Optional[int] = None
+    # Where to download the PDF once the job is done
+    result_url: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ResumeSummary(BaseModel):
+    """What the resume list needs, without the section columns"""
+    id: int
+    title: Optional[str] = None
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    city: Optional[str] = None
+    photo: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
 
 class Resume(ResumeBase):
     id: int
     user_id: int
+    version: int
+    updated_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
 
+    @validator(*SECTION_FIELDS, pre=True)
+    def dump_section(cls, v):
+        # Stored sections are lists; the API keeps returning JSON strings
+        if v is None or isinstance(v, str):
+            return v
+        return json.dumps(v)
+
     # Helper methods for PDF generation
     def get_experience_list(self) -> List[ExperienceItem]:
         return [ExperienceItem(**item) for item in json.loads(self.experience)]
@@ -0,0 +1,87 @@
+# tests/conftest.py
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app reads its settings at import: give it a throwaway database and blob
+# store, and no background renders running statements in the middle of a test
+DATA_DIR = tempfile.mkdtemp(prefix="cv-maker-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(DATA_DIR, 'app.db')}",
+    "BLOB_DIR": os.path.join(DATA_DIR, "blobs"),
+    "PDF_SPOOL_DIR": os.path.join(DATA_DIR, "spool"),
+    "PRERENDER_MODE": "off",
+    "BCRYPT_ROUNDS": "4",
+})
+
+import main  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from render_jobs import render_job_worker  # noqa: E402
+
+RESUME = {
+    "full_name": "Jane Doe",
+    "title": "Engineer",
+    "email": "jane@example.com",
+    "phone": "555 0100",
+    "city": "Paris",
+    "summary": "Builds things.",
+    "experience": json.dumps([{"company": "Acme", "position": "Developer", "start_date": "2020",
+                               "end_date": "2023", "is_current": False, "description": "Shipped things."}]),
+    "education": json.dumps([{"institution": "University", "degree": "BSc", "start_date": "2016",
+                              "description": ""}]),
+    "skills": json.dumps([{"skill": "Python", "proficiency": "Expert"}]),
+    "projects": json.dumps([{"name": "CV maker", "link": "https://example.com", "description": ""}]),
+    "certifications": "[]",
+    "languages": json.dumps([{"language": "English", "proficiency": "Native"}]),
+    "photo": None,
+}
+
+# A 1x1 PNG
+PHOTO = "data:image/png;base64," + base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8cfc000000301010018dd8db00000000049454e44ae426082"
+)).decode()
+
+
+class User:
+    """A registered user and the bearer header for their requests."""
+
+    def __init__(self, client: TestClient, email: str, password: str = "password123"):
+        self.client = client
+        self.email = email
+        self.password = password
+        client.post("/register", json={"email": email, "password": password}).raise_for_status()
+        token = client.post("/token", data={"username": email, "password": password}).json()["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def create_render_job(self) -> str:
+        response = self.client.post(f"/resumes/{self.create_resume()}/render-jobs", headers=self.headers)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def create_resume(self, **fields) -> int:
+        response = self.client.post("/resumes/", json={**RESUME, **fields}, headers=self.headers)
+        response.raise_for_status()
+        return response.json()["id"]
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        # Tests drive the render job queue themselves
+        client.portal.call(render_job_worker.stop)
+        yield client
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def user(client) -> User:
+    return User(client, "jane@example.com")
@@ -0,0 +1,12 @@
+# tests/test_export.py
+import io
+import zipfile
+
+
+def test_export_merges_entries_of_the_same_theme(client, user):
+    resume_id = user.create_resume()
+    entries = [{"resume_id": resume_id, "theme": theme} for theme in ("", "default", "nope", "modern-blue")]
+    response = client.post("/resumes/export", json={"entries": entries}, headers=user.headers)
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    assert names == [f"{resume_id}_Jane_Doe_default.pdf", f"{resume_id}_Jane_Doe_modern-blue.pdf"]
@@ -0,0 +1,20 @@
+# tests/test_pdf_download.py
+from urllib.parse import quote
+
+
+def test_download_name_outside_latin1(client, user):
+    resume_id = user.create_resume(full_name='Zoë "Ünïcode"')
+    response = client.get(f"/resumes/{resume_id}/pdf", params={"theme": "modern-blue"}, headers=user.headers)
+    assert response.status_code == 200
+    disposition = response.headers["content-disposition"]
+    assert disposition.startswith("attachment; filename*=utf-8''" + quote('Zoë_"Ünïcode"_modern-blue_'))
+
+
+def test_unknown_theme_shares_default_render(client, user):
+    resume_id = user.create_resume()
+    default = client.get(f"/resumes/{resume_id}/pdf", headers=user.headers)
+    unknown = client.get(f"/resumes/{resume_id}/pdf", params={"theme": 'x"\r\nSet-Cookie: a=b'}, headers=user.headers)
+    assert unknown.status_code == 200
+    assert unknown.headers["etag"] == default.headers["etag"]
+    assert "x-render-builds" not in unknown.headers
+    assert "_default_" in unknown.headers["content-disposition"]
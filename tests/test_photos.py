@@ -0,0 +1,13 @@
+# tests/test_photos.py
+from conftest import PHOTO
+
+
+def test_only_the_exact_photo_version_is_immutable(client, user):
+    resume_id = user.create_resume(photo=PHOTO)
+    photo_url = client.get(f"/resumes/{resume_id}", headers=user.headers).json()["photo"]
+    cached = client.get(photo_url, headers=user.headers)
+    assert cached.status_code == 200
+    assert "immutable" in cached.headers["cache-control"]
+    version = photo_url.split("v=")[1]
+    short = client.get(f"/resumes/{resume_id}/photo", params={"v": version[:1]}, headers=user.headers)
+    assert short.headers["cache-control"] == "private, no-cache"
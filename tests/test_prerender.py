@@ -0,0 +1,20 @@
+# tests/test_prerender.py
+import asyncio
+
+from prerender import Debouncer
+from query_stats import QueryStats, current_queries
+
+
+def test_debounced_job_does_not_inherit_the_request_context():
+    seen = []
+
+    async def job():
+        seen.append(current_queries.get())
+
+    async def request():
+        current_queries.set(QueryStats())
+        Debouncer(0).schedule("resume", job)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(request())
+    assert seen == [None]
@@ -0,0 +1,23 @@
+# tests/test_preview.py
+import json
+
+
+def test_unknown_theme_gets_the_default_etag(client, user):
+    resume_id = user.create_resume()
+    default = client.get(f"/resumes/{resume_id}/preview", headers=user.headers)
+    for theme in ('a"b', "x\r\nSet-Cookie: a=b", "ünïcode"):
+        response = client.get(f"/resumes/{resume_id}/preview", params={"theme": theme}, headers=user.headers)
+        assert response.status_code == 200
+        assert response.headers["etag"] == default.headers["etag"]
+        assert "set-cookie" not in response.headers
+
+
+def test_project_links_only_for_safe_schemes(client, user):
+    projects = [
+        {"name": "a", "link": "javascript:alert(1)", "description": ""},
+        {"name": "b", "link": "https://example.com/b", "description": ""},
+    ]
+    resume_id = user.create_resume(projects=json.dumps(projects))
+    html = client.get(f"/resumes/{resume_id}/preview", headers=user.headers).text
+    assert 'href="javascript' not in html
+    assert 'href="https://example.com/b"' in html
@@ -0,0 +1,187 @@
+# tests/test_queries.py
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+import models
+from auth_cache import auth_cache
+from conftest import PHOTO, RESUME
+from database import SessionLocal, engine
+from query_stats import assert_max_queries
+from render_cache import render_cache
+from render_jobs import render_job_worker
+
+# Plan steps that read a whole table or sort its rows
+BAD_STEP = re.compile(r"^SCAN (users|resumes|render_jobs)\b|USE TEMP B-TREE")
+
+# Each case sets up what its request needs and returns the request, so only
+# the request's own statements count against the budget. The render job
+# worker's cases call the worker directly and have no response
+
+
+def list_resumes(client, user):
+    for _ in range(5):
+        user.create_resume()
+    return lambda: client.get("/resumes/", headers=user.headers)
+
+
+def list_resumes_new_token(client, user):
+    user.create_resume()
+    auth_cache.clear()
+    return lambda: client.get("/resumes/", headers=user.headers)
+
+
+def get_resume(client, user):
+    resume_id = user.create_resume()
+    return lambda: client.get(f"/resumes/{resume_id}", headers=user.headers)
+
+
+def download_rendered(client, user):
+    resume_id = user.create_resume()
+    render_cache.clear()
+    return lambda: client.get(f"/resumes/{resume_id}/pdf", headers=user.headers)
+
+
+def download_cached(client, user):
+    resume_id = user.create_resume()
+    client.get(f"/resumes/{resume_id}/pdf", headers=user.headers).raise_for_status()
+    return lambda: client.get(f"/resumes/{resume_id}/pdf", headers=user.headers)
+
+
+def update_resume(client, user):
+    resume_id = user.create_resume()
+    return lambda: client.put(f"/resumes/{resume_id}", json={**RESUME, "title": "Manager"}, headers=user.headers)
+
+
+def patch_resume(client, user):
+    resume_id = user.create_resume()
+    patch = {
+        "title": "Manager",
+        "ops": [{"section": "skills", "op": "add", "item": {"skill": "SQL", "proficiency": "Good"}}],
+    }
+    return lambda: client.patch(f"/resumes/{resume_id}", json=patch, headers=user.headers)
+
+
+def delete_resume(client, user):
+    resume_id = user.create_resume(photo=PHOTO)
+    return lambda: client.delete(f"/resumes/{resume_id}", headers=user.headers)
+
+
+def get_photo(client, user):
+    resume_id = user.create_resume(photo=PHOTO)
+    return lambda: client.get(f"/resumes/{resume_id}/photo", headers=user.headers)
+
+
+def preview_resume(client, user):
+    resume_id = user.create_resume()
+    return lambda: client.get(f"/resumes/{resume_id}/preview", headers=user.headers)
+
+
+def create_render_job(client, user):
+    resume_id = user.create_resume()
+    return lambda: client.post(f"/resumes/{resume_id}/render-jobs", headers=user.headers)
+
+
+def get_render_job(client, user):
+    job_id = user.create_render_job()
+    return lambda: client.get(f"/render-jobs/{job_id}", headers=user.headers)
+
+
+def finish_render_jobs(client):
+    """Process the queued render jobs, as the stopped worker would have."""
+    while True:
+        job_id = client.portal.call(render_job_worker._claim)
+        if job_id is None:
+            return
+        client.portal.call(render_job_worker._process, job_id)
+
+
+def run_render_job(client, user):
+    finish_render_jobs(client)
+    user.create_render_job()
+
+    def run():
+        job_id = client.portal.call(render_job_worker._claim)
+        client.portal.call(render_job_worker._process, job_id)
+    return run
+
+
+def expire_render_jobs(client, user):
+    job_id = user.create_render_job()
+    finish_render_jobs(client)
+    with SessionLocal() as db:
+        db.get(models.RenderJob, job_id).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+
+    def expire():
+        client.portal.call(render_job_worker.expire)
+    return expire
+
+
+# The most statements each request may run; the user's token is already in
+# auth_cache unless the case clears it
+QUERY_BUDGETS = [
+    (list_resumes, 1),
+    (list_resumes_new_token, 2),
+    (get_resume, 1),
+    (download_rendered, 2),
+    (download_cached, 1),
+    (update_resume, 2),
+    (patch_resume, 2),
+    (delete_resume, 6),
+    (get_photo, 1),
+    (preview_resume, 1),
+    (create_render_job, 2),
+    (get_render_job, 1),
+    (run_render_job, 6),
+    (expire_render_jobs, 6),
+]
+
+
+@pytest.mark.parametrize("case, budget", QUERY_BUDGETS, ids=[case.__name__ for case, _ in QUERY_BUDGETS])
+def test_query_budget(client, user, case, budget):
+    request = case(client, user)
+    with assert_max_queries(budget):
+        response = request()
+    if response is not None:
+        assert response.is_success
+
+
+@pytest.fixture(scope="module")
+def many_users(client):
+    """Enough users, resumes and render jobs that a table scan costs more than an index lookup."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        first_user = conn.scalar(select(func.max(models.User.id))) + 1
+        users = range(first_user, first_user + 2000)
+        conn.execute(insert(models.User), [
+            {"id": user, "email": f"user{user}@example.com", "hashed_password": "x"} for user in users
+        ])
+        conn.execute(insert(models.Resume), [
+            {"user_id": user, "title": f"Resume {n}", "version": 1, "photo_hash": f"{user:032x}{n:032x}"}
+            for user in users for n in range(5)
+        ])
+        conn.execute(insert(models.RenderJob), [
+            {"id": f"{user:032x}", "user_id": user, "resume_id": user, "status": "done",
+             "next_attempt_at": now, "expires_at": now + timedelta(days=1), "result_hash": f"{user:064x}"}
+            for user in users
+        ])
+        # Statistics let the planner weigh the indexes as it would on a real database
+        conn.exec_driver_sql("ANALYZE")
+
+
+@pytest.mark.parametrize("case, budget", QUERY_BUDGETS, ids=[case.__name__ for case, _ in QUERY_BUDGETS])
+def test_query_plans(client, user, many_users, case, budget):
+    """The statements behind each request use indexes instead of reading whole tables."""
+    request = case(client, user)
+    with assert_max_queries(budget) as recorder:
+        request()
+    with engine.connect() as conn:
+        for statement, parameters in zip(recorder.statements, recorder.parameters):
+            if not statement.lstrip().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            steps = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            bad = [step for step in steps if BAD_STEP.search(step)]
+            assert not bad, f"{' '.join(statement.split())}\n" + "\n".join(steps)
@@ -0,0 +1,14 @@
+# tests/test_resume_writes.py
+from conftest import RESUME
+
+
+def test_if_match_needs_a_strong_validator(client, user):
+    resume_id = user.create_resume()
+    etag = client.get(f"/resumes/{resume_id}", headers=user.headers).headers["etag"]
+    body = {**RESUME, "title": "Manager"}
+    weak = client.put(f"/resumes/{resume_id}", json=body, headers={**user.headers, "If-Match": f"W/{etag}"})
+    assert weak.status_code == 412
+    strong = client.put(f"/resumes/{resume_id}", json=body, headers={**user.headers, "If-Match": etag})
+    assert strong.status_code == 200
+    stale = client.put(f"/resumes/{resume_id}", json=body, headers={**user.headers, "If-Match": etag})
+    assert stale.status_code == 412
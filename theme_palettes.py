@@ -0,0 +1,86 @@
+# theme_palettes.py
+# The layout and colours of each theme, kept apart from the ReportLab styles
+# in themes.py so the HTML preview and the request handlers can use them
+# without loading the PDF stack.
+from typing import Dict, NamedTuple
+
+DEFAULT_THEME = "default"
+
+
+class ThemeInfo(NamedTuple):
+    """A theme's name, layout and palette (hex strings)."""
+    name: str
+    layout: str
+    palette: Dict[str, str]
+
+
+THEMES = {info.name: info for info in (
+    ThemeInfo('coral-sunset', 'banner', {
+        'primary': '#FF7F50',            # Main coral color
+        'header_background': '#FFE4E1',  # Light coral for background
+        'name': '#FF4433',               # Dark coral for accents
+        'heading': '#FF4433',
+        'heading_border': '#FF7F50',
+        'contact': '#4A4A4A',            # Dark gray for text
+        'text': '#4A4A4A',
+        'rule': '#FF7F50',
+    }),
+    ThemeInfo('nature-green', 'banner', {
+        'primary': '#4CAF50',            # Main green
+        'header_background': '#E8F5E9',  # Light green for background
+        'name': '#2E7D32',               # Dark green for headings
+        'heading': '#2E7D32',
+        'heading_border': '#81C784',     # Accent green
+        'contact': '#555555',
+        'text': '#333333',
+        'rule': '#81C784',
+    }),
+    ThemeInfo('modern-blue', 'banner', {
+        'primary': '#1E88E5',
+        'header_background': '#E3F2FD',
+        'name': '#1565C0',
+        'heading': '#1565C0',
+        'heading_border': '#1E88E5',
+        'contact': '#555555',
+        'text': '#333333',
+        'rule': '#AAAAAA',
+    }),
+    ThemeInfo('creative-purple', 'sidebar', {
+        'primary': '#4B0082',
+        'sidebar_background': '#4B0082',
+        'sidebar_text': '#FFFFFF',
+        'name': '#000000',
+        'title': '#555555',
+        'heading': '#4B0082',
+        'text': '#333333',
+        'info': '#777777',
+    }),
+    ThemeInfo('elegant-dark', 'columns', {
+        'primary': '#333333',
+        'name': '#FFFFFF',
+        'title': '#DDDDDD',
+        'contact': '#EEEEEE',
+        'heading': '#333333',
+        'heading_background': '#F0F0F0',
+        'text': '#444444',
+        'info': '#555555',
+        'rule': '#AAAAAA',
+        'header_rule': '#999999',
+    }),
+    ThemeInfo(DEFAULT_THEME, 'classic', {
+        'primary': '#222222',
+        'name': '#222222',
+        'title': '#555555',
+        'contact': '#333333',
+        'heading': '#222222',
+        'text': '#333333',
+        'info': '#777777',
+        'rule': '#AAAAAA',
+        'header_rule': '#999999',
+    }),
+)}
+
+
+def get_theme_info(name) -> ThemeInfo:
+    """Look up a theme by name, falling back to the default theme."""
+    return THEMES.get(name or DEFAULT_THEME, THEMES[DEFAULT_THEME])
@@ -0,0 +1,357 @@
+# themes.py
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+from theme_palettes import DEFAULT_THEME, THEMES
+
+
+class Theme:
+    """
+    A resume theme: which layout it uses, its palette (hex strings, from
+    theme_palettes), and the ReportLab paragraph and table styles derived
+    from it. Themes are built
+    once per process and shared read-only by every render.
+    """
+
+    def __init__(self, name, layout, palette, styles, table_styles):
+        self.name = name
+        self.layout = layout
+        self.palette = palette
+        self.styles = styles
+        self.table_styles = table_styles
+
+
+def _banner_theme(info, prefix, base, header_padding, column_padding, heading, name_font=None):
+    """Coloured header banner above a two-column body (coral-sunset, nature-green, modern-blue)."""
+    palette = info.palette
+    c = {key: colors.HexColor(value) for key, value in palette.items()}
+    name_options = {'fontName': name_font} if name_font else {}
+    styles = {
+        'name': ParagraphStyle(
+            f'{prefix}NameStyle',
+            parent=base['Heading1'],
+            fontSize=24,
+            leading=28,
+            textColor=c['name'],
+            spaceAfter=6,
+            **name_options
+        ),
+        'title': ParagraphStyle(
+            f'{prefix}TitleStyle',
+            parent=base['Heading2'],
+            fontSize=14,
+            textColor=c['primary'],
+            spaceAfter=12
+        ),
+        'contact': ParagraphStyle(
+            f'{prefix}ContactStyle',
+            parent=base['Normal'],
+            fontSize=10,
+            textColor=c['contact'],
+            leading=12
+        ),
+        'section_heading': ParagraphStyle(
+            f'{prefix}SectionHeading',
+            parent=base['Heading2'],
+            textColor=c['heading'],
+            borderColor=c['heading_border'],
+            **heading
+        ),
+        'body': ParagraphStyle(
+            f'{prefix}BodyStyle',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=14,
+            textColor=c['text']
+        ),
+        'info': ParagraphStyle(
+            f'{prefix}InfoStyle',
+            parent=base['Normal'],
+            fontSize=9,
+            textColor=c['primary']
+        ),
+    }
+    table_styles = {
+        'header': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), c['header_background']),
+            ('LEFTPADDING', (0, 0), (-1, -1), header_padding),
+            ('RIGHTPADDING', (0, 0), (-1, -1), header_padding),
+            ('TOPPADDING', (0, 0), (-1, -1), 20),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ]),
+        'columns': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), column_padding),
+            ('RIGHTPADDING', (0, 0), (-1, -1), column_padding),
+            ('LINEBEFORE', (1, 0), (1, -1), 0.5, c['rule']),
+        ]),
+        'main': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+    }
+    return Theme(info.name, info.layout, palette, styles, table_styles)
+
+
+def _creative_purple(base):
+    """Solid purple sidebar next to the main column."""
+    info = THEMES['creative-purple']
+    palette = info.palette
+    c = {key: colors.HexColor(value) for key, value in palette.items()}
+    styles = {
+        'left_heading': ParagraphStyle(
+            'LeftHeadingStyle',
+            parent=base['Heading2'],
+            fontSize=12,
+            leading=14,
+            textColor=c['sidebar_text'],
+            spaceAfter=5
+        ),
+        'left_body': ParagraphStyle(
+            'LeftBodyStyle',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=12,
+            textColor=c['sidebar_text']
+        ),
+        'name': ParagraphStyle(
+            'RightNameStyle',
+            parent=base['Heading1'],
+            fontSize=18,
+            textColor=c['name'],
+            spaceAfter=4
+        ),
+        'title': ParagraphStyle(
+            'RightTitleStyle',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=c['title'],
+            spaceAfter=6
+        ),
+        'body': ParagraphStyle(
+            'RightBodyStyle',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=14,
+            textColor=c['text']
+        ),
+        'section_heading': ParagraphStyle(
+            'RightSectionHeading',
+            parent=base['Heading2'],
+            fontSize=14,
+            textColor=c['heading'],
+            spaceBefore=12,
+            spaceAfter=6
+        ),
+        'info': ParagraphStyle(
+            'RightInfoStyle',
+            parent=base['Normal'],
+            fontSize=9,
+            textColor=c['info']
+        ),
+    }
+    table_styles = {
+        'sidebar': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), c['sidebar_background']),
+            ('LEFTPADDING', (0, 0), (-1, -1), 20),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        'main': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (0, -1), 0),    # Left column padding
+            ('RIGHTPADDING', (-1, 0), (-1, -1), 8), # Right column padding
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+            ('BACKGROUND', (0, 0), (0, -1), c['sidebar_background']),  # Purple background for entire left column
+        ]),
+    }
+    return Theme(info.name, info.layout, palette, styles, table_styles)
+
+
+def _columns_table_styles(c):
+    return {
+        'header': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 20),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 20),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ]),
+        'rule': TableStyle([
+            ('LINEBELOW', (0, 0), (-1, 0), 1, c['header_rule']),
+        ]),
+        'photo': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'columns': TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+            ('LINEBEFORE', (1, 0), (1, -1), 0.5, c['rule']),
+        ]),
+    }
+
+
+def _elegant_dark(base):
+    """Plain two-column body with grey section bars; the header is not drawn."""
+    info = THEMES['elegant-dark']
+    palette = info.palette
+    c = {key: colors.HexColor(value) for key, value in palette.items()}
+    styles = {
+        'name': ParagraphStyle(
+            'NameStyleDark',
+            parent=base['Heading1'],
+            fontSize=20,
+            leading=24,
+            textColor=c['name'],
+            spaceAfter=6
+        ),
+        'title': ParagraphStyle(
+            'TitleStyleDark',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=c['title'],
+            spaceAfter=4
+        ),
+        'contact': ParagraphStyle(
+            'ContactStyleDark',
+            parent=base['Normal'],
+            fontSize=10,
+            textColor=c['contact'],
+            leading=12
+        ),
+        'section_heading': ParagraphStyle(
+            'SectionHeadingDark',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=c['heading'],
+            backColor=c['heading_background'],
+            spaceBefore=8,
+            spaceAfter=6,
+            leftIndent=4,
+            rightIndent=4
+        ),
+        'body': ParagraphStyle(
+            'BodyStyleDark',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=14,
+            textColor=c['text']
+        ),
+        'info': ParagraphStyle(
+            'InfoStyleDark',
+            parent=base['Normal'],
+            fontSize=9,
+            textColor=c['info']
+        ),
+    }
+    return Theme(info.name, info.layout, palette, styles, _columns_table_styles(c))
+
+
+def _default(base):
+    """Name and contact header over a ruled two-column body."""
+    info = THEMES[DEFAULT_THEME]
+    palette = info.palette
+    c = {key: colors.HexColor(value) for key, value in palette.items()}
+    styles = {
+        'name': ParagraphStyle(
+            'NameStyleDefault',
+            parent=base['Heading1'],
+            fontSize=20,
+            leading=24,
+            textColor=c['name'],
+            spaceAfter=4
+        ),
+        'title': ParagraphStyle(
+            'TitleStyleDefault',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=c['title'],
+            spaceAfter=4
+        ),
+        'contact': ParagraphStyle(
+            'ContactStyleDefault',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=12,
+            textColor=c['contact'],
+            alignment=TA_RIGHT
+        ),
+        'section_heading': ParagraphStyle(
+            'SectionHeadingDefault',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=c['heading'],
+            spaceBefore=8,
+            spaceAfter=6
+        ),
+        'body': ParagraphStyle(
+            'BodyStyleDefault',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=14,
+            textColor=c['text']
+        ),
+        'info': ParagraphStyle(
+            'InfoStyleDefault',
+            parent=base['Normal'],
+            fontSize=9,
+            textColor=c['info']
+        ),
+    }
+    return Theme(info.name, info.layout, palette, styles, _columns_table_styles(c))
+
+
+def _build_registry():
+    # Get the default styles from ReportLab; every theme style inherits from them
+    base = getSampleStyleSheet()
+    registry = [
+        _banner_theme(
+            THEMES['coral-sunset'], 'Coral', base,
+            header_padding=15,
+            column_padding=15,
+            heading={'fontSize': 14, 'spaceBefore': 12, 'spaceAfter': 6,
+                     'borderWidth': 0.5, 'borderPadding': 4, 'borderRadius': 2},
+            name_font='Helvetica-Bold',
+        ),
+        _banner_theme(
+            THEMES['nature-green'], 'Green', base,
+            header_padding=15,
+            column_padding=15,
+            heading={'fontSize': 14, 'spaceBefore': 12, 'spaceAfter': 6,
+                     'borderWidth': 0.5, 'borderPadding': 4, 'borderRadius': 2},
+            name_font='Helvetica-Bold',
+        ),
+        _banner_theme(
+            THEMES['modern-blue'], 'Blue', base,
+            header_padding=10,
+            column_padding=20,
+            heading={'fontSize': 16, 'spaceBefore': 15, 'spaceAfter': 8,
+                     'borderWidth': 1, 'borderPadding': 5, 'borderRadius': 3},
+        ),
+        _creative_purple(base),
+        _elegant_dark(base),
+        _default(base),
+    ]
+    return {theme.name: theme for theme in registry}
+
+
+_themes = None
+
+
+def load_themes():
+    """Build the theme registry; cheap after the first call in a process."""
+    global _themes
+    if _themes is None:
+        _themes = _build_registry()
+    return _themes
+
+
+def get_theme(name):
+    """Look up a theme by name, falling back to the default theme."""
+    themes = load_themes()
+    return themes.get(name or DEFAULT_THEME, themes[DEFAULT_THEME])
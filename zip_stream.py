@@ -0,0 +1,57 @@
+# zip_stream.py
+import zipfile
+from typing import Iterator
+
+from pdf_spool import STREAM_CHUNK_SIZE
+
+
+class _Sink:
+    """Write-only, unseekable file object that collects what zipfile writes."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    Builds a ZIP archive incrementally. Each method returns the archive bytes
+    produced so far, so entries can be sent as soon as they are added and
+    only the entry being written is ever held in memory. The sink cannot
+    seek, so zipfile writes sizes and CRCs in data descriptors after each entry.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=compression)
+
+    def add(self, name: str, data: bytes) -> bytes:
+        self._zip.writestr(name, data)
+        return self._sink.drain()
+
+    def add_file(self, name: str, path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        with open(path, "rb") as source, self._zip.open(name, mode="w", force_zip64=True) as entry:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                entry.write(chunk)
+                data = self._sink.drain()
+                if data:
+                    yield data
+        yield self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()